@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import argparse, glob, json, os, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from frequency import alphabet, confidence_threshold, letter_histogram, rank_keys, read_chunks
+from stream_cipher import shift_file, shift_text
+
+def find_files(pattern):												# Function to turn a directory or a glob into a sorted list of files.
+	if os.path.isdir(pattern):											# A directory means every .txt file straight inside it.
+		pattern = os.path.join(pattern, "*.txt")
+	return sorted(file for file in glob.glob(pattern) if os.path.isfile(file))
+
+def output_names(files):												# Function to give every file its own output name, even when two files share a name.
+	names = {}
+	taken = set()
+	for file in files:
+		name = os.path.splitext(os.path.basename(file))[0]
+		unique, count = name, 1
+		while unique in taken:											# Same file name in two folders, add a number to keep them apart.
+			count += 1
+			unique = "{}-{}".format(name, count)
+		taken.add(unique)
+		names[file] = unique
+	return names
+
+def crack_file(file, name, output_dir):									# Function run in a worker process to crack one file and write its answer.
+	start = time.perf_counter()
+	histogram = letter_histogram(read_chunks(file))						# One pass over the file to score every key.
+	key, confidence = rank_keys(histogram)[0]
+
+	decrypted_file = os.path.join(output_dir, name + ".decrypted.txt")
+	key_file = os.path.join(output_dir, name + ".key.txt")
+	shift_file(file, key, decrypted_file)								# Second pass streams the decrypted text out with the best key.
+	with open(key_file, "w", encoding="utf8") as f:						# Same layout as caesar-key.txt, only the letters that are in the file.
+		for letter, count in zip(alphabet, histogram):
+			if count:
+				f.write("{} : {}\n".format(letter.upper(), shift_text(letter, key).upper()))
+
+	return {
+		"file": file,
+		"key": key,
+		"confidence": confidence,
+		"english": confidence >= confidence_threshold,					# False when even the best key doesn't give english, the decrypted file is probably junk.
+		"elapsed": time.perf_counter() - start,
+		"decrypted": decrypted_file,
+		"key_map": key_file,
+	}
+
+def run_batch(pattern, output_dir="decrypted", workers=None, manifest="manifest.jsonl"):	# Function to crack every file matching pattern across a pool of processes.
+	files = find_files(pattern)
+	names = output_names(files)
+	os.makedirs(output_dir, exist_ok=True)
+	manifest_file = os.path.join(output_dir, manifest)
+	results = []
+
+	with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool, open(manifest_file, "w", encoding="utf8") as f:
+		jobs = {pool.submit(crack_file, file, names[file], output_dir): file for file in files}
+		for job in as_completed(jobs):									# Writing each file's line into the manifest as soon as it is finished.
+			try:
+				result = job.result()
+			except (OSError, UnicodeDecodeError) as error:				# One unreadable file shouldn't stop the whole batch.
+				result = {"file": jobs[job], "error": str(error)}
+			f.write(json.dumps(result) + "\n")
+			f.flush()
+			results.append(result)
+	return results
+
+def main():
+	parser = argparse.ArgumentParser(description="Crack every Caesar encrypted file in a directory or glob in parallel.")
+	parser.add_argument("files", help="directory (every .txt file in it) or glob pattern, e.g. 'poetry-*.txt'")
+	parser.add_argument("-o", "--output", default="decrypted", help="directory for the decrypted files, key maps and manifest")
+	parser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes, defaults to the number of cores")
+	args = parser.parse_args()
+
+	start = time.perf_counter()
+	results = run_batch(args.files, args.output, args.jobs)
+	finish = time.perf_counter()
+	failed = sum(1 for result in results if "error" in result)
+	unsure = [result["file"] for result in results if result.get("english") is False]
+	print("Cracked {} file(s), {} failed, manifest in {}".format(len(results) - failed - len(unsure), failed, os.path.join(args.output, "manifest.jsonl")))
+	for file in unsure:
+		print("No key gives english for {}, it might not be english or not be Caesar encrypted".format(file))
+	print(f"Finished in {round(finish-start, 2)} second(s)")
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import argparse, json, os, platform, random, statistics, sys, tempfile, time
+from dictionary_index import load_dictionary
+from frequency import rank_file_keys
+from key_search import search_key
+from stream_cipher import byte_table, chunk_size, shift_text
+
+here = os.path.dirname(os.path.abspath(__file__))
+corpora = {																# Bundled encrypted texts and the key that decrypts each of them.
+	"harry-potter-test.txt": 21,
+	"poetry-one.txt": 9,
+	"poetry-two.txt": 18,
+	"poetry-three.txt": 22,
+}
+units = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30}				# Size suffixes, 1K is 1024 bytes.
+
+def parse_size(text):													# Function to turn "1K", "10M", "1G" or "512" into a number of bytes.
+	text = text.upper().rstrip("B")
+	unit = text[-1] if text and text[-1] in units else ""
+	return int(float(text[:len(text) - len(unit)]) * units[unit])
+
+def plaintext_corpus():													# Function to decrypt the bundled corpora into one block of english text.
+	texts = []
+	for name, key in corpora.items():
+		with open(os.path.join(here, name), encoding="utf8") as f:
+			texts.append(shift_text(f.read(), key))
+	return "\n".join(texts)
+
+def generate(file, size, key, corpus):									# Function to write about size bytes of corpus encrypted with key.
+	block = shift_text(corpus, key).encode("utf8")
+	written = 0
+	with open(file, "wb") as f:
+		while written < size:
+			f.write(block[:size - written])								# Cutting the last block short so the file is the size asked for.
+			written += len(block[:size - written])
+	with open(file, "rb+") as f:										# Cutting a block short can split an accented letter in half, so trim back to valid utf8.
+		f.seek(max(0, size - 4))
+		tail = f.read()
+		while tail:
+			try:
+				tail.decode("utf8")
+				break
+			except UnicodeDecodeError:
+				tail = tail[:-1]
+		f.truncate(max(0, size - 4) + len(tail))
+
+def timed(function, *args):												# Function to time one call, returns (seconds, result).
+	start = time.perf_counter()
+	result = function(*args)
+	return time.perf_counter() - start, result
+
+def run_case(file, size, key, words):									# Function to time every phase of cracking one generated file.
+	expected = (26 - key) % 26											# The key that undoes the encryption, 0 is the same as 26.
+	phases = {}
+
+	phases["scoring"], ranked = timed(rank_file_keys, file)				# Histogram pass plus scoring all 26 keys.
+	phases["dictionary"], (found, confidence, sampled) = timed(search_key, file, words)	# Sampled dictionary lookups.
+
+	table = byte_table(found)
+	phases["io"] = phases["decryption"] = phases["output"] = 0.0
+	with open(file, "rb") as source, tempfile.TemporaryFile("wb") as destination:
+		while True:														# Same loop as decrypt() in caesar-cipher-threaded.py with a timer around each step.
+			start = time.perf_counter()
+			chunk = source.read(chunk_size)
+			read = time.perf_counter()
+			if not chunk:
+				phases["io"] += read - start
+				break
+			chunk = chunk.translate(table)
+			translated = time.perf_counter()
+			destination.write(chunk)
+			written = time.perf_counter()
+			phases["io"] += read - start
+			phases["decryption"] += translated - read
+			phases["output"] += written - translated
+
+	total = sum(phases.values())
+	return {
+		"size": size,
+		"key": key,
+		"expected_key": expected,
+		"ranked_key": ranked[0][0] % 26,
+		"found_key": found % 26,
+		"confidence": confidence,
+		"sampled_words": sampled,
+		"correct": ranked[0][0] % 26 == expected and found % 26 == expected,
+		"phases": phases,
+		"total": total,
+		"throughput_mb_s": size / (1 << 20) / total if total else None,
+	}
+
+def best_of(runs):														# Function to fold repeated runs of one case into one, each phase keeps its fastest time.
+	case = dict(runs[0])
+	case["phases"] = {phase: min(run["phases"][phase] for run in runs) for phase in case["phases"]}	# The minimum is the run with the least noise from the rest of the machine.
+	case["median_phases"] = {phase: statistics.median(run["phases"][phase] for run in runs) for phase in case["phases"]}
+	case["repeats"] = len(runs)
+	case["correct"] = all(run["correct"] for run in runs)
+	case["total"] = sum(case["phases"].values())
+	case["throughput_mb_s"] = case["size"] / (1 << 20) / case["total"] if case["total"] else None
+	return case
+
+def compare(results, baseline, tolerance, floor):						# Function to find every phase that got slower than the baseline run by more than tolerance and more than floor seconds.
+	previous = {case["size"]: case for case in baseline["cases"]}
+	slower = []
+	for case in results["cases"]:
+		old = previous.get(case["size"])
+		if old is None:
+			continue
+		for phase, seconds in case["phases"].items():
+			before = old["phases"].get(phase)
+			if before is None or seconds - before < floor:				# Sub-millisecond phases jitter by more than 20% between identical runs.
+				continue
+			if seconds > before * (1 + tolerance):
+				slower.append({"size": case["size"], "phase": phase, "before": before, "after": seconds})
+	return slower
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark the Caesar cracker on generated ciphertexts with known keys.")
+	parser.add_argument("--sizes", nargs="+", default=["1K", "64K", "1M", "16M"], help="sizes of the generated files, e.g. 1K 10M 1G")
+	parser.add_argument("--seed", type=int, default=0, help="seed for the encryption keys")
+	parser.add_argument("-o", "--output", help="file to write the JSON results to, stdout if not given")
+	parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+	parser.add_argument("--tolerance", type=float, default=0.2, help="fraction a phase may slow down by before it counts as slower (default 0.2)")
+	parser.add_argument("--floor", type=float, default=0.005, help="seconds a phase must slow down by before it counts as slower at all (default 0.005)")
+	parser.add_argument("-r", "--repeat", type=int, default=5, help="times every size is run, the fastest time of each phase is kept (default 5)")
+	args = parser.parse_args()
+
+	rng = random.Random(args.seed)
+	words = load_dictionary()
+	corpus = plaintext_corpus()
+	results = {
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"seed": args.seed,
+		"repeat": args.repeat,
+		"cases": [],
+	}
+
+	with tempfile.TemporaryDirectory() as folder:
+		for size in args.sizes:
+			size = parse_size(size)
+			key = rng.randrange(1, 26)									# Same keys every run for the same seed.
+			file = os.path.join(folder, "cipher-{}.txt".format(size))
+			generate(file, size, key, corpus)
+			results["cases"].append(best_of([run_case(file, size, key, words) for _ in range(max(1, args.repeat))]))
+			os.remove(file)												# Big files only need to exist while they are being timed.
+
+	failed = [case["size"] for case in results["cases"] if not case["correct"]]
+	if args.baseline:
+		with open(args.baseline, encoding="utf8") as f:
+			results["slower"] = compare(results, json.load(f), args.tolerance, args.floor)
+
+	output = json.dumps(results, indent=2)
+	if args.output:
+		with open(args.output, "w", encoding="utf8") as f:
+			f.write(output + "\n")
+	else:
+		print(output)
+
+	if failed:
+		print("Wrong key for size(s): {}".format(failed), file=sys.stderr)
+	if results.get("slower"):
+		print("{} phase(s) slower than the baseline".format(len(results["slower"])), file=sys.stderr)
+	return 1 if failed or results.get("slower") else 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import os, pickle
+
+here = os.path.dirname(os.path.abspath(__file__))						# Folder this file is in, so the dictionary is found from any working directory.
+dictionary_file = os.path.join(here, "dictionary")						# Word list, one word per line.
+cache_file = os.path.join(here, "dictionary.cache")						# Pickled set of words so we don't have to parse the word list every run.
+cache_version = 1														# Bump this if the layout of the cache changes.
+
+def source_stamp(file):													# Function to get what the cache was built from, so we know when to rebuild it.
+	info = os.stat(file)
+	return (cache_version, info.st_size, info.st_mtime_ns)
+
+def build_index(file):													# Function to read the word list into a set for exact O(1) lookups.
+	with open(file, encoding="utf8") as f:
+		return frozenset(word.strip().lower() for word in f if word.strip())
+
+def load_dictionary(file=dictionary_file, cache=cache_file):			# Function to get the set of words, from the cache if it is still up to date.
+	stamp = source_stamp(file)
+	if cache:
+		try:
+			with open(cache, "rb") as f:
+				cached_stamp, words = pickle.load(f)
+			if cached_stamp == stamp:									# Word list hasn't changed since the cache was written.
+				return words
+		except (OSError, EOFError, TypeError, ValueError, pickle.UnpicklingError):	# No cache yet or it is broken, just rebuild it.
+			pass
+
+	words = build_index(file)
+	if cache:
+		try:
+			with open(cache + ".tmp", "wb") as f:						# Writing to a temporary file first so a crash can't leave half a cache.
+				pickle.dump((stamp, words), f, protocol=pickle.HIGHEST_PROTOCOL)
+			os.replace(cache + ".tmp", cache)
+		except OSError:													# Read only folder, we still have the words for this run.
+			pass
+	return words
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import math, string
+
+alphabet = string.ascii_lowercase										# Lower case alphabet.
+letters = [letter.encode() for letter in alphabet]						# Each letter as bytes to count with bytes.count.
+chunk_size = 1 << 20													# Reading the ciphertext 1MB at a time so big files don't sit in memory.
+
+english_frequencies = [													# Relative frequency (%) of each letter a-z in english text.
+	8.167, 1.492, 2.782, 4.253, 12.702, 2.228, 2.015, 6.094, 6.966,
+	0.153, 0.772, 4.025, 2.406, 6.749, 7.507, 1.929, 0.095, 5.987,
+	6.327, 9.056, 2.758, 0.978, 2.360, 0.150, 1.974, 0.074,
+]
+english_frequencies = [f / 100 for f in english_frequencies]			# Turning the percentages into probabilities.
+fit_scale = 0.5															# English decrypted with the right key is 0.02-0.15 from these frequencies per letter, wrong keys and random letters are 3 or more.
+confidence_threshold = 0.1												# English scores 0.4 at 100 letters and 0.85+ past a few hundred, random letters stay under 0.01 at any length.
+
+def letter_histogram(chunks):											# Function to count every letter a-z over an iterable of text or bytes chunks.
+	counts = [0] * 26													# 26 bins, index 0 is "a".
+	for chunk in chunks:
+		if isinstance(chunk, str):
+			chunk = chunk.encode("utf8")
+		chunk = chunk.lower()											# bytes.lower() only changes A-Z so accented letters are left alone.
+		for position, letter in enumerate(letters):						# bytes.count runs in C, much faster than counting in a python loop or a Counter.
+			counts[position] += chunk.count(letter)
+	return counts
+
+def read_chunks(file):													# Generator to read a file in fixed size chunks of bytes.
+	with open(file, "rb") as f:
+		while True:
+			chunk = f.read(chunk_size)
+			if not chunk:
+				return
+			yield chunk
+
+def chi_squared(histogram, key):										# Function to score one key, lower means closer to english.
+	total = sum(histogram)
+	if total == 0:
+		return 0.0
+	score = 0.0
+	for position, expected in enumerate(english_frequencies):			# Letter "position" in the plaintext came from letter "position - key" in the ciphertext.
+		observed = histogram[(position - key) % 26]
+		expected = expected * total
+		score += (observed - expected) ** 2 / expected
+	return score
+
+def english_distance(histogram, key):									# Function to get chi-squared per letter, the same for a short or a long text.
+	total = sum(histogram)
+	if total == 0:
+		return float("inf")
+	return chi_squared(histogram, key) / total
+
+def rank_keys(histogram):												# Function to score all 26 keys from one histogram, best key first.
+	ranked = []
+	for key in range(1, 27):											# Keys go 1-26 like main() in caesar-cipher-threaded.py, 26 is the same as no shift.
+		distance = english_distance(histogram, key)
+		ranked.append((key, math.exp(-distance / fit_scale)))			# How english the text looks with this key, on its own and not shared out between the keys.
+	ranked.sort(key=lambda pair: pair[1], reverse=True)
+	return ranked														# List of (key, confidence) pairs.
+
+def rank_file_keys(file):												# Function to rank the keys of a file reading it only once.
+	return rank_keys(letter_histogram(read_chunks(file)))
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import string
+from types import SimpleNamespace
+from frequency import letter_histogram, rank_keys
+from stream_cipher import shift_text
+try:
+	import profiling
+except ImportError:												# Not started through profiling.py, the counters do nothing.
+	profiling = SimpleNamespace(count=lambda name, amount=1: None, timer=lambda name: lambda function: function)
+
+read_size = 4096														# Characters read each time the sample needs more words.
+
+class SampleReader:														# Reads words from the start of a file only as they are needed.
+	def __init__(self, file):
+		self.f = open(file, encoding="utf8")
+		self.words = []													# Words read so far, with the punctuation around them taken off.
+		self.partial = ""												# Half a word left over from the end of the last read.
+		self.exhausted = False											# True once the whole file has been read.
+
+	def take(self, count):												# Function to get the first count words, reading more of the file if we need to.
+		while len(self.words) < count and not self.exhausted:
+			chunk = self.f.read(read_size)
+			if not chunk:
+				self.exhausted = True
+				chunk, self.partial = self.partial, ""
+			else:
+				chunk, self.partial = self.partial + chunk, ""
+				if not chunk[-1].isspace():								# The last word might carry on in the next read so keep it back.
+					chunk, _, self.partial = chunk.rpartition(" ")
+			for word in chunk.split():
+				word = word.strip(string.punctuation)					# Taking punctuation off the ends but keeping it inside words like don't.
+				if word:
+					self.words.append(word.lower())
+		if self.exhausted:
+			self.f.close()
+		return self.words[:count]
+
+	def close(self):
+		self.f.close()
+
+def dictionary_score(sample, key, words):								# Function to get the fraction of sample words that are real words once decrypted with key.
+	if not sample:
+		return 0.0
+	decrypted = shift_text(" ".join(sample), key).split()				# Decrypting the whole sample with one translate instead of word by word.
+	found = sum(1 for word in decrypted if word in words)
+	profiling.count("key_search.dictionary_lookups", len(decrypted))	# Counted once per call, not per word, so it costs nothing in the loop.
+	profiling.count("key_search.dictionary_hits", found)
+	return found / len(decrypted)
+
+@profiling.timer("key_search.search_key")
+def search_key(file, words, threshold=0.75, sample_words=16, max_sample_words=4096):	# Function to find the key by decrypting only a small sample from the start of the file.
+	reader = SampleReader(file)
+	try:
+		size = sample_words
+		sample = reader.take(size)
+		candidates = [key for key, _ in rank_keys(letter_histogram([" ".join(sample)]))]	# Trying the keys that look most like english first so the right one usually comes up straight away.
+		while True:
+			scores = []
+			for key in candidates:
+				score = dictionary_score(sample, key, words)
+				if score >= threshold:									# Confident enough, no need to look at any other key.
+					return key, score, len(sample)
+				scores.append((score, key))
+			scores.sort(reverse=True)
+			if reader.exhausted or size >= max_sample_words:			# Nothing more to sample, the best we have is the answer.
+				best_score, best_key = scores[0]
+				return best_key, best_score, len(sample)
+			best_score = scores[0][0]
+			candidates = [key for score, key in scores if score >= best_score / 2]	# Still ambiguous, keep only the keys that are still in the running.
+			size *= 2													# and look at twice as many words.
+			sample = reader.take(size)
+	finally:
+		reader.close()
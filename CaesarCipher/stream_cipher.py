@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import argparse, string, sys
+from functools import lru_cache
+
+lowercase = string.ascii_lowercase										# Lower case alphabet.
+uppercase = string.ascii_uppercase										# Upper case alphabet.
+chunk_size = 1 << 20													# Bytes read per chunk, memory stays flat whatever the file size.
+
+@lru_cache(maxsize=26)
+def shift_table(key):													# Function to build the translate table that moves every letter forward by key.
+	key %= 26
+	shifted = lowercase[key:] + lowercase[:key]							# Rotating the alphabet by the key, so "a" lands on alphabet[key].
+	return str.maketrans(lowercase + uppercase, shifted + shifted.upper())	# Anything not in the table (punctuation, numbers, fadas like á é í ó ú) is left as it is.
+
+@lru_cache(maxsize=26)
+def byte_table(key):													# Same table as shift_table but for bytes, letters are plain ascii so utf8 text shifts safely as bytes.
+	key %= 26
+	shifted = lowercase[key:] + lowercase[:key]
+	return bytes.maketrans((lowercase + uppercase).encode(), (shifted + shifted.upper()).encode())
+
+def shift_text(text, key):												# Function to shift a string that is already in memory.
+	return text.translate(shift_table(key))
+
+def shift_stream(source, destination, key):								# Function to shift a binary file object into another chunk by chunk.
+	table = byte_table(key)
+	while True:
+		chunk = source.read(chunk_size)
+		if not chunk:
+			break
+		destination.write(chunk.translate(table))						# Translating bytes skips decoding the utf8, accented letters are never ascii bytes so they come out as they went in.
+
+def shift_file(file, key, output=None):									# Function to shift a file into another file, or stdout if there is no output file.
+	with open(file, "rb") as source:									# Binary so line endings and accented letters come out exactly the same as they went in.
+		if output is None:
+			sys.stdout.flush()											# Anything already printed has to come out before the raw bytes.
+			shift_stream(source, sys.stdout.buffer, key)
+			sys.stdout.buffer.flush()
+		else:
+			with open(output, "wb") as destination:
+				shift_stream(source, destination, key)
+
+def main():
+	parser = argparse.ArgumentParser(description="Shift every letter of a file forward by key. Encrypt with key k and decrypt with 26 - k, or with the key caesar-cipher-threaded.py finds.")
+	parser.add_argument("key", type=int, help="number of places to shift each letter")
+	parser.add_argument("file", help="file to encrypt or decrypt")
+	parser.add_argument("-o", "--output", help="file to write to, stdout if not given")
+	args = parser.parse_args()
+	shift_file(args.file, args.key, args.output)
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import os, random, string
+from frequency import confidence_threshold, letter_histogram, rank_file_keys, rank_keys
+from stream_cipher import shift_text
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+def random_letters(count, seed=0):										# Function to make text with every letter equally likely, nothing like english.
+	rng = random.Random(seed)
+	return "".join(rng.choice(string.ascii_lowercase) for _ in range(count))
+
+def test_random_letters_score_low_at_any_length():
+	for count in (200, 10000, 100000):
+		key, confidence = rank_keys(letter_histogram([random_letters(count)]))[0]
+		assert confidence < confidence_threshold, (count, key, confidence)
+
+def test_english_scores_high_at_any_length():
+	with open(os.path.join(here, "harry-potter-test.txt"), encoding="utf8", errors="ignore") as f:
+		text = f.read()
+	text = shift_text(text, rank_keys(letter_histogram([text]))[0][0])		# The bundled text is itself encrypted, decrypting it first.
+	for size in (1000, 10000, len(text)):
+		ranked = rank_keys(letter_histogram([shift_text(text[:size], 5)]))
+		key, confidence = ranked[0]
+		assert shift_text(shift_text("hello", 5), key) == "hello"			# The best key undoes the shift.
+		assert confidence > 0.8, (size, confidence)
+		assert ranked[1][1] < confidence_threshold						# and every other key is clearly wrong.
+
+def test_bundled_ciphertext_is_english():
+	key, confidence = rank_file_keys(os.path.join(here, "os-caesar-cipher.txt"))[0]
+	assert confidence > 0.8
@@ -0,0 +1,165 @@
+import argparse
+import heapq
+import os
+import re
+from collections import OrderedDict
+from types import SimpleNamespace
+
+try:
+    import profiling
+except ImportError:  # only there when profiling.py started us, otherwise the hooks cost nothing
+    profiling = SimpleNamespace(count=lambda name, amount=1: None, timer=lambda name: lambda function: function)
+
+facts_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prolog.pl")
+
+ROUTE = re.compile(r'^\s*route\(\s*(\w+)\s*,\s*(\w+)\s*,\s*([\d.]+)\s*,\s*"(\w*)"\s*\)\s*\.')
+MODE = re.compile(r"^\s*mode\(\s*(\w+)\s*,\s*([\d.]+)\s*,\s*(\w+)\s*\)\s*\.")
+
+
+def load_facts(path=facts_file):
+    # the route/4 and mode/3 facts of a prolog file, everything else (the rules) is skipped,
+    # returns [(from, to, distance, mode letters)] and {letter: (average speed, name)}
+    routes = []
+    modes = {}
+    with open(path) as f:
+        for line in f:
+            match = ROUTE.match(line)
+            if match:
+                source, destination, distance, letters = match.groups()
+                routes.append((source, destination, float(distance), letters))
+                continue
+            match = MODE.match(line)
+            if match:
+                letter, speed, name = match.groups()
+                modes[letter] = (float(speed), name)
+    return routes, modes
+
+
+class JourneyPlanner:
+    # the same question as journey/3 in prolog.pl: the quickest route between two places using only the given
+    # transport modes, where each leg goes at the fastest of its modes that are allowed, answered with Dijkstra
+    # over a per mode adjacency index instead of backtracking through every route
+    def __init__(self, routes, modes, cache_size=1024):
+        self.modes = modes
+        self.places = set()
+        self.index = {letter: {} for letter in modes}  # mode -> place -> [(next place, hours at that mode's speed)]
+        for source, destination, distance, letters in routes:
+            self.places.update((source, destination))
+            for letter in set(letters) & modes.keys():
+                self.index[letter].setdefault(source, []).append((destination, distance / modes[letter][0]))
+        self.merged = {}  # allowed modes -> place -> [(next place, hours)], quickest allowed mode per leg
+        self.trees = OrderedDict()  # (source, allowed modes) -> (hours, previous) shortest path trees, least recently used first
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_file(cls, path=facts_file, cache_size=1024):
+        routes, modes = load_facts(path)
+        return cls(routes, modes, cache_size)
+
+    def allowed(self, modes):  # "fc", ["f", "c"] or {"f", "c"} -> frozenset of known letters
+        return frozenset(self.modes.keys() & set(modes))
+
+    def adjacency(self, allowed):
+        # one adjacency list per combination of modes, built from the per mode index the first time it's asked for
+        merged = self.merged.get(allowed)
+        if merged is None:
+            merged = {}
+            for letter in allowed:
+                for place, legs in self.index[letter].items():
+                    best = merged.setdefault(place, {})
+                    for destination, hours in legs:
+                        if hours < best.get(destination, float("inf")):
+                            best[destination] = hours
+            merged = {place: list(best.items()) for place, best in merged.items()}
+            self.merged[allowed] = merged
+        return merged
+
+    def tree(self, source, allowed):
+        # the search from source with these modes, kept between queries so later ones carry on where it stopped
+        key = (source, allowed)
+        tree = self.trees.get(key)
+        if tree is not None:
+            self.hits += 1
+            profiling.count("journey.tree_cache.hits")
+            self.trees.move_to_end(key)
+            return tree
+        self.misses += 1
+        profiling.count("journey.tree_cache.misses")
+        tree = self.trees[key] = SearchTree(source, self.adjacency(allowed))
+        if len(self.trees) > self.cache_size:
+            self.trees.popitem(last=False)
+        return tree
+
+    @profiling.timer("journey.journey")
+    def journey(self, source, destination, modes):
+        # (route, hours) for the quickest way from source to destination, None if the modes can't get there,
+        # like the prolog a journey needs at least one leg, so source == destination has no route
+        tree = self.tree(source, self.allowed(modes))
+        if destination == source or not tree.settle(destination):
+            return None
+        route = [destination]
+        while route[-1] != source:
+            route.append(tree.previous[route[-1]])
+        route.reverse()
+        return route, tree.hours[destination]
+
+
+class SearchTree:
+    # Dijkstra from one place that only runs as far as it has been asked to, the heap is kept
+    # so a query for a place further out picks up where the last one stopped instead of starting over
+    def __init__(self, source, adjacency):
+        self.adjacency = adjacency
+        self.hours = {source: 0.0}
+        self.previous = {}
+        self.settled = set()
+        self.heap = [(0.0, source)]
+
+    def settle(self, destination):  # run until destination's time is final, False if it can't be reached
+        hours, previous, settled, heap, adjacency = self.hours, self.previous, self.settled, self.heap, self.adjacency
+        pops = 0
+        while destination not in settled and heap:
+            time_so_far, place = heapq.heappop(heap)
+            pops += 1
+            if place in settled:  # stale entry
+                continue
+            settled.add(place)
+            for next_place, leg in adjacency.get(place, ()):
+                new_time = time_so_far + leg
+                if new_time < hours.get(next_place, float("inf")):
+                    hours[next_place] = new_time
+                    previous[next_place] = place
+                    heapq.heappush(heap, (new_time, next_place))
+        profiling.count("journey.dijkstra.pops", pops)
+        return destination in settled
+
+
+def format_time(hours):
+    whole = int(hours)
+    minutes = round((hours - whole) * 60)
+    if minutes == 60:
+        whole, minutes = whole + 1, 0
+    return "{}h {}mins".format(whole, minutes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quickest route between two places with the given transport modes")
+    parser.add_argument("source")
+    parser.add_argument("destination")
+    parser.add_argument("modes", help="mode letters, e.g. fc for foot and car")
+    parser.add_argument("--facts", default=facts_file, help="prolog file with the route/4 and mode/3 facts")
+    args = parser.parse_args()
+
+    planner = JourneyPlanner.from_file(args.facts)
+    result = planner.journey(args.source, args.destination, args.modes)
+    if result is None:
+        print("No route from {} to {} with {}".format(args.source, args.destination, args.modes))
+        return
+    route, hours = result
+    print("Route = [{}]".format(",".join(route)))
+    print("Time = {}".format(format_time(hours)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import argparse
+import os
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from grid_search import Grid, randomGrid
+
+QueryResult = namedtuple("QueryResult", ["start", "end", "path", "seconds"])     # seconds is this query's share of its field plus its own walk
+
+_grid = None        # the shared map, handed to each worker process once
+
+
+def distanceField(grid, goal):
+    # breadth first search out from the goal, one numpy step per wave of cells, gives the number of moves
+    # from every cell to the goal (-1 if it can't reach it) indexed like grid.blocked
+    blocked = np.frombuffer(grid.blocked, dtype=np.uint8).astype(bool)
+    distances = np.full(blocked.size, -1, dtype=np.int32)
+    target = grid.index(goal)
+    if blocked[target]:
+        return distances
+    steps = np.array([-grid.width, grid.width, -1, 1])
+    distances[target] = 0
+    frontier = np.array([target])
+    distance = 0
+    while frontier.size:
+        distance += 1
+        neighbors = (frontier[:, None] + steps).ravel()     # the padding ring is blocked so this never leaves the grid
+        neighbors = np.unique(neighbors[~blocked[neighbors] & (distances[neighbors] < 0)])     # a cell next to two frontier cells only goes in once
+        distances[neighbors] = distance
+        frontier = neighbors
+    return distances
+
+
+def followField(grid, distances, start):
+    # walk downhill from start to the goal, every step lands on a cell one move closer
+    width = grid.width
+    current = grid.index(start)
+    remaining = distances[current]
+    if remaining < 0:
+        return []
+    path = [current]
+    while remaining:
+        remaining -= 1
+        if distances[current - width] == remaining:        # UP
+            current -= width
+        elif distances[current + width] == remaining:      # DOWN
+            current += width
+        elif distances[current - 1] == remaining:          # LEFT
+            current -= 1
+        else:                                               # RIGHT
+            current += 1
+        path.append(current)
+    rows, cols = np.divmod(np.array(path), width)
+    return list(zip((rows - 1).tolist(), (cols - 1).tolist()))
+
+
+def answerGoal(grid, goal, starts):
+    # one field for the goal, reused by every query heading there
+    begin = time.perf_counter()
+    distances = memoryview(distanceField(grid, goal))      # plain int lookups for the walks, indexing numpy one cell at a time is slow
+    field_seconds = (time.perf_counter() - begin) / len(starts)
+    results = []
+    for start in starts:
+        begin = time.perf_counter()
+        path = followField(grid, distances, start)
+        results.append(QueryResult(start, goal, path, field_seconds + time.perf_counter() - begin))
+    return results
+
+
+def _attach(barriers_bytes, shape):
+    global _grid
+    _grid = Grid(np.frombuffer(barriers_bytes, dtype=bool).reshape(shape))
+
+
+def _answerGoal(goal, starts):
+    return answerGoal(_grid, goal, starts)
+
+
+def latencyStats(results):
+    seconds = sorted(result.seconds for result in results)
+    if not seconds:
+        return {"queries": 0}
+
+    def percentile(fraction):
+        return seconds[min(len(seconds) - 1, int(fraction * len(seconds)))]
+
+    return {
+        "queries": len(seconds),
+        "mean": sum(seconds) / len(seconds),
+        "p50": percentile(0.50),
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+        "max": seconds[-1],
+    }
+
+
+def batchQueries(barriers, queries, processes=None):
+    # answer many (start, end) queries on one grid, grouped by end so each goal's distance field is built once,
+    # goals are spread over a process pool (processes=1 runs everything here), results come back in query order
+    barriers = np.ascontiguousarray(barriers, dtype=bool)
+    groups = {}
+    for index, (start, end) in enumerate(queries):
+        groups.setdefault(tuple(end), []).append((index, tuple(start)))
+
+    answers = [None] * len(queries)
+    if processes == 1:
+        grid = Grid(barriers)
+        batches = (answerGoal(grid, goal, [start for _, start in members]) for goal, members in groups.items())
+        for (goal, members), results in zip(groups.items(), batches):
+            for (index, _), result in zip(members, results):
+                answers[index] = result
+    else:
+        with ProcessPoolExecutor(max_workers=processes or os.cpu_count(), initializer=_attach,
+                                 initargs=(barriers.tobytes(), barriers.shape)) as pool:
+            jobs = [(members, pool.submit(_answerGoal, goal, [start for _, start in members])) for goal, members in groups.items()]
+            for members, job in jobs:
+                for (index, _), result in zip(members, job.result()):
+                    answers[index] = result
+    return answers, latencyStats(answers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer a batch of random path queries on a random grid")
+    parser.add_argument("--size", type=int, default=1024)
+    parser.add_argument("--density", type=float, default=0.2, help="fraction of cells that are barriers")
+    parser.add_argument("--queries", type=int, default=10000)
+    parser.add_argument("--goals", type=int, default=16, help="number of different end points the queries share")
+    parser.add_argument("-j", "--processes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    barriers = randomGrid(args.size, args.density, args.seed)
+    rng = random.Random(args.seed)
+    free = np.argwhere(~barriers)
+    goals = [tuple(free[rng.randrange(len(free))]) for _ in range(args.goals)]
+    queries = [(tuple(free[rng.randrange(len(free))]), rng.choice(goals)) for _ in range(args.queries)]
+
+    begin = time.perf_counter()
+    answers, stats = batchQueries(barriers, queries, args.processes)
+    finish = time.perf_counter()
+    print("{} queries, {} found a path, {:.3f}s total".format(len(answers), sum(1 for answer in answers if answer.path), finish - begin))
+    print("per query: mean {mean:.6f}s p50 {p50:.6f}s p95 {p95:.6f}s p99 {p99:.6f}s max {max:.6f}s".format(**stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import argparse
+import heapq
+import math
+import random
+import time
+
+from grid_search import Grid, astar, randomGrid
+
+INF = math.inf
+
+
+class DStarLite:
+    # D* Lite on a 4-connected grid, the search runs backwards from the end so g (cost to the end) survives
+    # the start moving and barriers changing, updateCells() only repairs the cells whose cost actually changed
+    def __init__(self, barriers, start, end):
+        self.grid = barriers if isinstance(barriers, Grid) else Grid(barriers)
+        self.width = self.grid.width
+        self.blocked = bytearray(self.grid.blocked)          # our own copy, updateCells() edits it
+        self.steps = (-self.width, self.width, -1, 1)       # up, down, left, right
+        self.start = self.grid.index(start)
+        self.end = self.grid.index(end)
+        self.last = self.start      # where the start was when km was last bumped
+        self.km = 0                 # how far the start has moved, keeps old keys comparable with new ones
+        self.g = {}                 # cost to the end as of the last expansion, missing means infinite
+        self.rhs = {self.end: 0}    # one step lookahead of g, a cell is consistent when the two agree
+        self.queued = {}            # cell -> key it's queued under, anything else in the heap is stale
+        self.open_set = []
+        self.expanded = 0           # cells expanded by the last path()/updateCells()/move()
+        if not self.blocked[self.end]:
+            self.push(self.end)
+
+    def heuristic(self, index):     # manhattan distance from the start, the search goes towards it
+        row, col = divmod(index, self.width)
+        start_row, start_col = divmod(self.start, self.width)
+        return abs(row - start_row) + abs(col - start_col)
+
+    def key(self, index):
+        best = min(self.g.get(index, INF), self.rhs.get(index, INF))
+        return best + self.heuristic(index) + self.km, best
+
+    def push(self, index):
+        key = self.key(index)
+        self.queued[index] = key
+        heapq.heappush(self.open_set, (key, index))
+
+    def lookahead(self, index):     # best cost to the end through a neighbour
+        if self.blocked[index]:
+            return INF
+        if index == self.end:
+            return 0
+        g, blocked = self.g, self.blocked
+        return min((g.get(index + step, INF) for step in self.steps if not blocked[index + step]), default=INF) + 1
+
+    def updateVertex(self, index):
+        if self.g.get(index, INF) != self.rhs.get(index, INF):
+            self.push(index)
+        else:
+            self.queued.pop(index, None)
+
+    def top(self):                  # smallest key still queued, stale heap entries are thrown away on the way
+        open_set, queued = self.open_set, self.queued
+        while open_set:
+            key, index = open_set[0]
+            if queued.get(index) == key:
+                return key, index
+            heapq.heappop(open_set)
+        return (INF, INF), None
+
+    def computeShortestPath(self):
+        g, rhs, blocked, steps = self.g, self.rhs, self.blocked, self.steps
+        expanded = 0
+        while True:
+            key, index = self.top()
+            start = self.start
+            if index is None or (key >= self.key(start) and rhs.get(start, INF) == g.get(start, INF)):
+                break
+            new_key = self.key(index)
+            if key < new_key:       # the start moved since this was queued, requeue with its real key
+                self.push(index)
+                continue
+            heapq.heappop(self.open_set)
+            del self.queued[index]
+            expanded += 1
+            if g.get(index, INF) > rhs[index]:      # overconsistent, the cost to the end went down
+                g[index] = rhs[index]
+                for step in steps:
+                    neighbor = index + step
+                    if not blocked[neighbor] and neighbor != self.end and rhs[index] + 1 < rhs.get(neighbor, INF):
+                        rhs[neighbor] = rhs[index] + 1
+                        self.updateVertex(neighbor)
+            else:                   # underconsistent, a barrier cut us off, every neighbour that relied on us rechecks
+                old = g.pop(index, INF)
+                for neighbor in (index,) + tuple(index + step for step in steps):
+                    if neighbor != self.end and (neighbor == index or rhs.get(neighbor, INF) == old + 1):
+                        rhs[neighbor] = self.lookahead(neighbor)
+                    self.updateVertex(neighbor)
+        self.expanded = expanded
+
+    def walk(self):                 # follow the cheapest neighbours from the start down to the end
+        g, blocked, steps = self.g, self.blocked, self.steps
+        current = self.start
+        if g.get(current, INF) == INF or blocked[current]:
+            return []
+        path = [current]
+        while current != self.end:
+            current = min((current + step for step in steps if not blocked[current + step]),
+                          key=lambda neighbor: 0 if neighbor == self.end else g.get(neighbor, INF))
+            path.append(current)
+        return [self.grid.pos(index) for index in path]
+
+    def path(self):
+        self.computeShortestPath()
+        return self.walk()
+
+    def updateCells(self, changes):
+        # changes maps (row, col) to True for a new barrier and False for a cleared one (a dict or (pos, barrier) pairs),
+        # returns the repaired path from the start, empty if there isn't one any more
+        touched = set()
+        for pos, barrier in dict(changes).items():
+            index = self.grid.index(pos)
+            if self.blocked[index] == bool(barrier):
+                continue
+            self.blocked[index] = bool(barrier)
+            touched.add(index)
+            touched.update(index + step for step in self.steps)
+        for index in touched:
+            if index == self.end:
+                self.rhs[index] = INF if self.blocked[index] else 0
+            else:
+                self.rhs[index] = self.lookahead(index)
+            self.updateVertex(index)
+        return self.path()
+
+    def move(self, start):
+        # the agent moved to start, keeps every g value and only bumps km instead of requeueing the whole heap
+        index = self.grid.index(start)
+        self.km += abs(index // self.width - self.last // self.width) + abs(index % self.width - self.last % self.width)
+        self.start = self.last = index
+        return self.path()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replan a path with D* Lite while random cells flip")
+    parser.add_argument("--size", type=int, default=1024)
+    parser.add_argument("--density", type=float, default=0.2, help="fraction of cells that are barriers")
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--changes", type=int, default=10, help="cells flipped every tick")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    barriers = randomGrid(args.size, args.density, args.seed)
+    start, end = (0, 0), (args.size - 1, args.size - 1)
+    begin = time.perf_counter()
+    planner = DStarLite(barriers, start, end)
+    path = planner.path()
+    print("first plan: path length {}, expanded {} nodes in {:.3f}s".format(len(path), planner.expanded, time.perf_counter() - begin))
+
+    rng = random.Random(args.seed)
+    for tick in range(args.ticks):
+        changes = {}
+        for _ in range(args.changes):       # flip cells on or next to the current path so the change matters
+            row, col = rng.choice(path) if path else (rng.randrange(args.size), rng.randrange(args.size))
+            row = min(args.size - 1, max(0, row + rng.randint(-2, 2)))
+            col = min(args.size - 1, max(0, col + rng.randint(-2, 2)))
+            if (row, col) not in (start, end):
+                changes[row, col] = not barriers[row, col]
+                barriers[row, col] = not barriers[row, col]
+        begin = time.perf_counter()
+        path = planner.updateCells(changes)
+        replan = time.perf_counter() - begin
+        begin = time.perf_counter()
+        fresh = astar(barriers, start, end)
+        print("tick {}: replanned in {:.4f}s ({} expanded), A* from scratch {:.4f}s ({} expanded), path length {}".format(
+            tick, replan, planner.expanded, time.perf_counter() - begin, fresh.expanded, len(path)))
+
+
+if __name__ == "__main__":
+    main()
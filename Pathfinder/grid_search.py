@@ -0,0 +1,367 @@
+import argparse
+import heapq
+import math
+import time
+from collections import namedtuple
+from types import SimpleNamespace
+
+import numpy as np
+
+try:
+    import profiling
+except ImportError:  # only importable when started through profiling.py, the hooks do nothing otherwise
+    profiling = SimpleNamespace(count=lambda name, amount=1: None, timer=lambda name: lambda function: function)
+
+SearchResult = namedtuple("SearchResult", ["path", "expanded", "cost", "seconds", "strategy"], defaults=(None, None, None))   # path is a list of (row, col), empty if there is none
+SQRT2 = math.sqrt(2)
+
+
+class Grid:         # occupancy grid padded with a ring of barriers so neighbours never need bounds checks
+    def __init__(self, barriers):
+        barriers = np.asarray(barriers, dtype=bool)
+        self.rows, self.cols = barriers.shape
+        self.width = self.cols + 2                                  # row length of the padded grid
+        self.blocked = np.pad(barriers, 1, constant_values=True).tobytes()      # one byte per cell, 1 is a barrier
+
+    def index(self, pos):           # (row, col) -> flat index in the padded grid
+        row, col = pos
+        return (row + 1) * self.width + col + 1
+
+    def pos(self, index):           # flat index -> (row, col)
+        row, col = divmod(index, self.width)
+        return row - 1, col - 1
+
+    def isBarrier(self, pos):
+        return self.blocked[self.index(pos)] == 1
+
+
+def reconstructPath(grid, came_from, current):      # walk back from the end node to the start node
+    path = [current]
+    while current in came_from:
+        current = came_from[current]
+        path.append(current)
+    path.reverse()
+    return [grid.pos(index) for index in path]
+
+
+@profiling.timer("grid_search.astar")
+def astar(barriers, start, end, onOpen=None, onClose=None):
+    # A* on a 4-connected grid with a Manhattan heuristic, barriers is a 2D bool array (or anything numpy
+    # can turn into one) or a Grid, onOpen/onClose are optional (row, col) callbacks for visualisation
+    grid = barriers if isinstance(barriers, Grid) else Grid(barriers)
+    blocked, width = grid.blocked, grid.width
+    source, target = grid.index(start), grid.index(end)
+    if blocked[source] or blocked[target]:
+        return SearchResult([], 0)
+    end_row, end_col = divmod(target, width)
+    steps = ((-width, -1, 0), (width, 1, 0), (-1, 0, -1), (1, 0, 1))      # up, down, left, right as (index step, row step, col step)
+
+    g_score = {source: 0}           # keeps track of current shortest distance from start node to this node
+    came_from = {}                  # keeps track of what nodes come from where to find best path in the end
+    closed = bytearray(len(blocked))
+    h = abs(source // width - end_row) + abs(source % width - end_col)
+    open_set = [(h, h, source)]     # ties on f broken by the smaller h so the search heads straight for the end
+    expanded = 0
+    heappush, heappop = heapq.heappush, heapq.heappop
+
+    while open_set:
+        _, _, current = heappop(open_set)
+        if closed[current]:         # stale entry, this node was already expanded with a better score
+            continue
+        if current == target:
+            profiling.count("grid_search.astar.expanded", expanded)
+            return SearchResult(reconstructPath(grid, came_from, current), expanded, g_score[current])
+        closed[current] = 1
+        expanded += 1
+        if onClose is not None:
+            onClose(grid.pos(current))
+
+        temp_g_score = g_score[current] + 1
+        row, col = divmod(current, width)
+        row_offset, col_offset = row - end_row, col - end_col
+        for step, row_step, col_step in steps:
+            neighbor = current + step
+            if blocked[neighbor] or closed[neighbor] or temp_g_score >= g_score.get(neighbor, temp_g_score + 1):
+                continue
+            came_from[neighbor] = current
+            g_score[neighbor] = temp_g_score
+            h = abs(row_offset + row_step) + abs(col_offset + col_step)
+            heappush(open_set, (temp_g_score + h, h, neighbor))
+            if onOpen is not None:
+                onOpen(grid.pos(neighbor))
+
+    profiling.count("grid_search.astar.expanded", expanded)
+    return SearchResult([], expanded)
+
+
+def octile(row_offset, col_offset):     # distance when diagonal steps cost sqrt(2)
+    row_offset, col_offset = abs(row_offset), abs(col_offset)
+    return max(row_offset, col_offset) + (SQRT2 - 1) * min(row_offset, col_offset)
+
+
+@profiling.timer("grid_search.weightedAstar")
+def weightedAstar(barriers, start, end, costs=None, diagonal=False):
+    # A* where stepping into a cell costs costs[row][col] (1 everywhere if costs is None), with diagonal=True
+    # it's 8-connected with an octile heuristic, a diagonal step costs sqrt(2) times the cell and can't cut a barrier's corner
+    grid = barriers if isinstance(barriers, Grid) else Grid(barriers)
+    blocked, width = grid.blocked, grid.width
+    source, target = grid.index(start), grid.index(end)
+    if blocked[source] or blocked[target]:
+        return SearchResult([], 0)
+    if costs is None:
+        cell_cost, scale = None, 1
+    else:
+        costs = np.asarray(costs, dtype=np.float64)
+        free = np.frombuffer(blocked, dtype=np.uint8).reshape(grid.rows + 2, width)[1:-1, 1:-1] == 0
+        scale = float(costs[free].min()) if free.any() else 1      # cheapest step keeps the heuristic admissible
+        if scale <= 0:
+            raise ValueError("cell costs have to be positive")
+        cell_cost = memoryview(np.pad(costs, 1, constant_values=np.inf).ravel())     # plain float lookups in the loop
+    distance = octile if diagonal else (lambda row_offset, col_offset: abs(row_offset) + abs(col_offset))
+    end_row, end_col = divmod(target, width)
+    steps = [(-width, 1, 0, 0), (width, 1, 0, 0), (-1, 1, 0, 0), (1, 1, 0, 0)]      # (index step, length, row step, col step)
+    if diagonal:        # the row and col steps are only needed to check the corner cells of a diagonal move
+        steps += [(row_step * width + col_step, SQRT2, row_step, col_step) for row_step in (-1, 1) for col_step in (-1, 1)]
+
+    g_score = {source: 0}
+    came_from = {}
+    closed = bytearray(len(blocked))
+    h = scale * distance(source // width - end_row, source % width - end_col)
+    open_set = [(h, h, source)]
+    expanded = 0
+
+    while open_set:
+        _, _, current = heapq.heappop(open_set)
+        if closed[current]:
+            continue
+        if current == target:
+            profiling.count("grid_search.weightedAstar.expanded", expanded)
+            return SearchResult(reconstructPath(grid, came_from, current), expanded, g_score[current])
+        closed[current] = 1
+        expanded += 1
+
+        for step, length, row_step, col_step in steps:
+            neighbor = current + step
+            if blocked[neighbor] or closed[neighbor]:
+                continue
+            if row_step and (blocked[current + row_step * width] or blocked[current + col_step]):      # no cutting corners
+                continue
+            temp_g_score = g_score[current] + (length if cell_cost is None else length * cell_cost[neighbor])
+            if temp_g_score >= g_score.get(neighbor, math.inf):
+                continue
+            came_from[neighbor] = current
+            g_score[neighbor] = temp_g_score
+            row, col = divmod(neighbor, width)
+            h = scale * distance(row - end_row, col - end_col)
+            heapq.heappush(open_set, (temp_g_score + h, h, neighbor))
+
+    profiling.count("grid_search.weightedAstar.expanded", expanded)
+    return SearchResult([], expanded)
+
+
+@profiling.timer("grid_search.jps")
+def jps(barriers, start, end):
+    # Jump Point Search on a uniform cost 8-connected grid (no corner cutting), it only expands the cells where
+    # the best path can turn, everything in between is jumped over in a straight line
+    grid = barriers if isinstance(barriers, Grid) else Grid(barriers)
+    blocked, width = grid.blocked, grid.width
+    source, target = grid.index(start), grid.index(end)
+    if blocked[source] or blocked[target]:
+        return SearchResult([], 0)
+    end_row, end_col = divmod(target, width)
+
+    height = grid.rows + 2
+    columns = np.frombuffer(blocked, dtype=np.uint8).reshape(height, width).T.tobytes()     # same cells column by column
+    target_column = end_col * height + end_row
+
+    def scan(cells, stride, current, step, goal):
+        # straight jump along a line of cells (rows of length stride) done with bytes searches instead of a python loop,
+        # stops at goal, or at a free cell beside the line whose neighbour one step back is a barrier (a forced
+        # neighbour), returns -1 if it runs into a barrier first
+        if step > 0:
+            wall = cells.find(b"\x01", current + 1)
+            stop = wall
+            found = cells.find(b"\x01\x00", current - stride, wall - stride)
+            if found != -1:
+                stop = found + 1 + stride
+            found = cells.find(b"\x01\x00", current + stride, wall + stride)
+            if found != -1 and found + 1 - stride < stop:
+                stop = found + 1 - stride
+            if current < goal <= stop:      # the wall itself is never the goal, it's a barrier
+                return goal
+        else:
+            wall = cells.rfind(b"\x01", 0, current)
+            stop = wall
+            found = cells.rfind(b"\x00\x01", wall + 1 - stride, current + 1 - stride)
+            if found != -1:
+                stop = found + stride
+            found = cells.rfind(b"\x00\x01", wall + 1 + stride, current + 1 + stride)
+            if found != -1 and found - stride > stop:
+                stop = found - stride
+            if stop <= goal < current:
+                return goal
+        return -1 if stop == wall else stop
+
+    def jumpStraight(current, row_step, col_step):
+        row, col = divmod(current, width)
+        if col_step:
+            return scan(blocked, width, current, col_step, target if row == end_row else -1)
+        found = scan(columns, height, col * height + row, row_step, target_column if col == end_col else -1)
+        if found == -1:
+            return -1
+        col, row = divmod(found, height)
+        return row * width + col
+
+    def jump(current, row_step, col_step):
+        # keep going from current in one direction until hitting a barrier (-1) or a jump point
+        if not (row_step and col_step):
+            return jumpStraight(current, row_step, col_step)
+        step = row_step * width + col_step
+        while True:
+            current += step
+            if blocked[current]:
+                return -1
+            if current == target:
+                return current
+            if jumpStraight(current, 0, col_step) != -1 or jumpStraight(current, row_step, 0) != -1:
+                return current
+            if blocked[current + col_step] or blocked[current + row_step * width]:      # no cutting corners
+                return -1
+
+    def directions(current, parent):
+        # which way to look from current, pruned by the direction we came in from
+        if parent is None:
+            found = [(row_step, col_step) for row_step, col_step in ((-1, 0), (1, 0), (0, -1), (0, 1)) if not blocked[current + row_step * width + col_step]]
+            found += [(row_step, col_step) for row_step in (-1, 1) for col_step in (-1, 1)
+                      if not blocked[current + row_step * width] and not blocked[current + col_step] and not blocked[current + row_step * width + col_step]]
+            return found
+        row, col = divmod(current, width)
+        parent_row, parent_col = divmod(parent, width)
+        row_step = (row > parent_row) - (row < parent_row)
+        col_step = (col > parent_col) - (col < parent_col)
+        found = []
+        if row_step and col_step:
+            vertical, horizontal = not blocked[current + row_step * width], not blocked[current + col_step]
+            if vertical:
+                found.append((row_step, 0))
+            if horizontal:
+                found.append((0, col_step))
+            if vertical and horizontal:
+                found.append((row_step, col_step))
+        elif col_step:
+            ahead, down, up = not blocked[current + col_step], not blocked[current + width], not blocked[current - width]
+            if ahead:
+                found.append((0, col_step))
+                if down:
+                    found.append((1, col_step))
+                if up:
+                    found.append((-1, col_step))
+            if down:
+                found.append((1, 0))
+            if up:
+                found.append((-1, 0))
+        else:
+            ahead, right, left = not blocked[current + row_step * width], not blocked[current + 1], not blocked[current - 1]
+            if ahead:
+                found.append((row_step, 0))
+                if right:
+                    found.append((row_step, 1))
+                if left:
+                    found.append((row_step, -1))
+            if right:
+                found.append((0, 1))
+            if left:
+                found.append((0, -1))
+        return found
+
+    g_score = {source: 0}
+    came_from = {}
+    closed = set()
+    h = octile(source // width - end_row, source % width - end_col)
+    open_set = [(h, h, source)]
+    expanded = 0
+
+    while open_set:
+        _, _, current = heapq.heappop(open_set)
+        if current in closed:
+            continue
+        if current == target:
+            jump_points = reconstructPath(grid, came_from, current)
+            path = jump_points[:1]
+            for (row, col), (next_row, next_col) in zip(jump_points, jump_points[1:]):     # fill in the cells between jump points
+                row_step, col_step = (next_row > row) - (next_row < row), (next_col > col) - (next_col < col)
+                while (row, col) != (next_row, next_col):
+                    row, col = row + row_step, col + col_step
+                    path.append((row, col))
+            profiling.count("grid_search.jps.expanded", expanded)
+            return SearchResult(path, expanded, g_score[current])
+        closed.add(current)
+        expanded += 1
+
+        row, col = divmod(current, width)
+        for row_step, col_step in directions(current, came_from.get(current)):
+            point = jump(current, row_step, col_step)
+            if point == -1 or point in closed:
+                continue
+            point_row, point_col = divmod(point, width)
+            temp_g_score = g_score[current] + octile(point_row - row, point_col - col)
+            if temp_g_score >= g_score.get(point, math.inf):
+                continue
+            came_from[point] = current
+            g_score[point] = temp_g_score
+            h = octile(point_row - end_row, point_col - end_col)
+            heapq.heappush(open_set, (temp_g_score + h, h, point))
+
+    profiling.count("grid_search.jps.expanded", expanded)
+    return SearchResult([], expanded)
+
+
+STRATEGIES = {
+    "astar": lambda barriers, start, end, costs: astar(barriers, start, end),
+    "astar8": lambda barriers, start, end, costs: weightedAstar(barriers, start, end, diagonal=True),
+    "weighted": lambda barriers, start, end, costs: weightedAstar(barriers, start, end, costs),
+    "weighted8": lambda barriers, start, end, costs: weightedAstar(barriers, start, end, costs, diagonal=True),
+    "jps": lambda barriers, start, end, costs: jps(barriers, start, end),
+}
+
+
+def search(barriers, start, end, strategy="astar", costs=None):
+    # run one strategy and time it, astar is 4-connected, astar8 and jps are 8-connected with uniform cost,
+    # weighted and weighted8 use costs (cost of stepping into each cell)
+    grid = barriers if isinstance(barriers, Grid) else Grid(barriers)
+    begin = time.perf_counter()
+    result = STRATEGIES[strategy](grid, start, end, costs)
+    return result._replace(seconds=time.perf_counter() - begin, strategy=strategy)
+
+
+def compareStrategies(barriers, start, end, strategies=("astar", "astar8", "jps"), costs=None):
+    # every strategy on the same map, fastest first
+    grid = barriers if isinstance(barriers, Grid) else Grid(barriers)
+    return sorted((search(grid, start, end, strategy, costs) for strategy in strategies), key=lambda result: result.seconds)
+
+
+def randomGrid(size, density, seed=None):       # square grid with roughly density of the cells as barriers
+    barriers = np.random.default_rng(seed).random((size, size)) < density
+    barriers[0, 0] = barriers[-1, -1] = False
+    return barriers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless A* on a random grid")
+    parser.add_argument("--size", type=int, default=4096)
+    parser.add_argument("--density", type=float, default=0.2, help="fraction of cells that are barriers")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES) + ["all"], default="astar",
+                        help="all runs every strategy, the weighted ones get random cell costs from 1 to 10")
+    args = parser.parse_args()
+
+    barriers = randomGrid(args.size, args.density, args.seed)
+    costs = np.random.default_rng(args.seed).integers(1, 11, barriers.shape)
+    strategies = sorted(STRATEGIES) if args.strategy == "all" else [args.strategy]
+    for result in compareStrategies(barriers, (0, 0), (args.size - 1, args.size - 1), strategies, costs):
+        print("{:<10} path length {}, cost {}, expanded {} nodes in {:.3f}s".format(
+            result.strategy, len(result.path), result.cost, result.expanded, result.seconds))
+
+
+if __name__ == "__main__":
+    main()
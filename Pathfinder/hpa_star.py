@@ -0,0 +1,339 @@
+import argparse
+import heapq
+import math
+import random
+import time
+
+import numpy as np
+
+from grid_search import SearchResult, astar, randomGrid
+
+INF = math.inf
+
+
+def bfs(blocked, width, source, targets):
+    # breadth first search over a padded local grid, stops once every target is reached,
+    # returns {target: distance} and the parent of every visited cell
+    found = {}
+    remaining = set(targets)
+    if source in remaining:
+        found[source] = 0
+        remaining.discard(source)
+    parents = {source: None}
+    frontier = [source]
+    distance = 0
+    steps = (-width, width, -1, 1)
+    while frontier and remaining:
+        distance += 1
+        next_frontier = []
+        for current in frontier:
+            for step in steps:
+                neighbor = current + step
+                if blocked[neighbor] or neighbor in parents:
+                    continue
+                parents[neighbor] = current
+                next_frontier.append(neighbor)
+                if neighbor in remaining:
+                    found[neighbor] = distance
+                    remaining.discard(neighbor)
+        frontier = next_frontier
+    return found, parents
+
+
+class HPAStar:
+    # hierarchical A*: the grid is cut into cluster_size square clusters, cells where two clusters touch become
+    # entrances, and an abstract graph links the entrances of each cluster by their distance inside it,
+    # queries search that small graph and then fill in the cells one cluster at a time, the paths come out
+    # close to, but not always exactly, the shortest
+    def __init__(self, barriers, cluster_size=32):
+        barriers = np.asarray(barriers, dtype=bool)
+        self.rows, self.cols = barriers.shape
+        self.width = self.cols + 2
+        self.size = cluster_size
+        self.blocked = bytearray(np.pad(barriers, 1, constant_values=True).tobytes())      # padded like grid_search.Grid
+        self.cells = np.frombuffer(self.blocked, dtype=np.uint8).reshape(self.rows + 2, self.width)    # numpy view of the same bytes
+        self.borders = {}           # (kind, cluster row, cluster col) -> [(cell, cell across the border)]
+        self.partners = {}          # entrance -> entrances across a border from it
+        self.intra = {}             # cluster -> {entrance: [(entrance, distance)]}, built the first time a query needs it
+        self.cluster_rows = -(-self.rows // cluster_size)
+        self.cluster_cols = -(-self.cols // cluster_size)
+        for cluster_col in range(self.cluster_cols - 1):
+            self.scanBorder("v", 0, cluster_col, self.rows)
+        for cluster_row in range(self.cluster_rows - 1):
+            self.scanBorder("h", cluster_row, 0, self.cols)
+
+    def index(self, pos):
+        row, col = pos
+        return (row + 1) * self.width + col + 1
+
+    def pos(self, index):
+        row, col = divmod(index, self.width)
+        return row - 1, col - 1
+
+    def clusterOf(self, index):
+        row, col = divmod(index, self.width)
+        return (row - 1) // self.size, (col - 1) // self.size
+
+    def scanBorder(self, kind, cluster_row, cluster_col, length):
+        # find the entrances along a border line starting at cluster (cluster_row, cluster_col) and running length
+        # cells ("v" is the line between it and the cluster to its right, "h" the one below), every run of cells open
+        # on both sides gets an entrance in its middle, or one at each end if it's 6 or more long
+        size, width = self.size, self.width
+        if kind == "v":
+            col = (cluster_col + 1) * size          # first column of the cluster on the right, padded it's col + 1
+            first = cluster_row * size
+            open_cells = (self.cells[first + 1:first + length + 1, col] == 0) & (self.cells[first + 1:first + length + 1, col + 1] == 0)
+        else:
+            row = (cluster_row + 1) * size
+            first = cluster_col * size
+            open_cells = (self.cells[row, first + 1:first + length + 1] == 0) & (self.cells[row + 1, first + 1:first + length + 1] == 0)
+        positions = np.arange(first, first + length)
+        before = np.concatenate(([False], open_cells[:-1]))
+        after = np.concatenate((open_cells[1:], [False]))
+        run_starts = np.flatnonzero(open_cells & (~before | (positions % size == 0)))       # runs never cross into the next cluster
+        run_ends = np.flatnonzero(open_cells & (~after | (positions % size == size - 1)))
+
+        lines = {}
+        for run_start, run_end in zip((run_starts + first).tolist(), (run_ends + first).tolist()):
+            picks = (run_start, run_end) if run_end - run_start + 1 >= 6 else ((run_start + run_end) // 2,)
+            for position in picks:
+                if kind == "v":
+                    key = ("v", position // size, cluster_col)
+                    pair = ((position + 1) * width + col, (position + 1) * width + col + 1)
+                else:
+                    key = ("h", cluster_row, position // size)
+                    pair = (row * width + position + 1, (row + 1) * width + position + 1)
+                lines.setdefault(key, []).append(pair)
+
+        changed = set()
+        for segment in range(first // size, (first + length - 1) // size + 1):
+            key = (kind, segment, cluster_col) if kind == "v" else (kind, cluster_row, segment)
+            pairs = lines.get(key, [])
+            old = self.borders.get(key, [])
+            if pairs == old:
+                continue
+            for one, two in old:
+                for cell, other in ((one, two), (two, one)):
+                    self.partners[cell].remove(other)
+                    if not self.partners[cell]:     # no longer an entrance, don't keep it around
+                        del self.partners[cell]
+            for one, two in pairs:
+                self.partners.setdefault(one, []).append(two)
+                self.partners.setdefault(two, []).append(one)
+            if pairs:
+                self.borders[key] = pairs
+            else:
+                self.borders.pop(key, None)
+            changed.update(self.clusterOf(cell) for pair in old + pairs for cell in pair)
+        return changed
+
+    def entrances(self, cluster):
+        cluster_row, cluster_col = cluster
+        keys = (("v", cluster_row, cluster_col), ("v", cluster_row, cluster_col - 1), ("h", cluster_row, cluster_col), ("h", cluster_row - 1, cluster_col))
+        return {cell for key in keys for pair in self.borders.get(key, ()) for cell in pair if self.clusterOf(cell) == cluster}
+
+    def local(self, cluster):
+        # the cluster's cells as their own padded grid, so searches inside it need no bounds checks,
+        # returns the grid and functions mapping global indices to local ones and back
+        cluster_row, cluster_col = cluster
+        top, left = cluster_row * self.size, cluster_col * self.size
+        bottom, right = min(top + self.size, self.rows), min(left + self.size, self.cols)
+        blocked = np.pad(self.cells[top + 1:bottom + 1, left + 1:right + 1], 1, constant_values=1).tobytes()
+        local_width = right - left + 2
+        width = self.width
+
+        def toLocal(index):
+            row, col = divmod(index, width)
+            return (row - top) * local_width + col - left
+
+        def toGlobal(index):
+            row, col = divmod(index, local_width)
+            return (row + top) * width + col + left
+
+        return blocked, local_width, toLocal, toGlobal
+
+    def clusterEdges(self, cluster):
+        # distances between every pair of entrances of a cluster, cached until the cluster changes,
+        # all the entrances flood the cluster together with one bit each, so it's one numpy pass per wave
+        # instead of one python search per entrance
+        edges = self.intra.get(cluster)
+        if edges is None:
+            blocked, local_width, toLocal, toGlobal = self.local(cluster)
+            cells = sorted(self.entrances(cluster))
+            edges = {cell: [] for cell in cells}
+            free = (np.frombuffer(blocked, dtype=np.uint8) == 0).reshape(-1, local_width)
+            rows, cols = np.divmod(np.array([toLocal(cell) for cell in cells], dtype=np.intp), local_width)
+            words = (len(cells) + 63) // 64
+            frontier = np.zeros((words,) + free.shape, dtype=np.uint64)
+            for bit, (row, col) in enumerate(zip(rows.tolist(), cols.tolist())):
+                frontier[bit // 64, row, col] |= np.uint64(1 << (bit % 64))
+            reached = frontier.copy()
+            distance = 0
+            while frontier.any():
+                distance += 1
+                spread = np.zeros_like(frontier)
+                spread[:, 1:] |= frontier[:, :-1]
+                spread[:, :-1] |= frontier[:, 1:]
+                spread[:, :, 1:] |= frontier[:, :, :-1]
+                spread[:, :, :-1] |= frontier[:, :, 1:]
+                spread &= ~reached
+                spread[:, ~free] = 0
+                reached |= spread
+                frontier = spread
+                hits = spread[:, rows, cols]            # (word, entrance) -> sources that just got there
+                for target in np.flatnonzero(hits.any(axis=0)).tolist():
+                    for word in range(words):
+                        sources = int(hits[word, target])
+                        while sources:
+                            low = sources & -sources
+                            edges[cells[word * 64 + low.bit_length() - 1]].append((cells[target], distance))
+                            sources ^= low
+            self.intra[cluster] = edges
+        return edges
+
+    def build(self):                # fill the whole abstract graph up front instead of as queries need it
+        for cluster_row in range(self.cluster_rows):
+            for cluster_col in range(self.cluster_cols):
+                self.clusterEdges((cluster_row, cluster_col))
+
+    def connect(self, index):       # distances from a cell that isn't an entrance to the entrances of its cluster
+        cluster = self.clusterOf(index)
+        blocked, local_width, toLocal, toGlobal = self.local(cluster)
+        entrances = {toLocal(cell): cell for cell in self.entrances(cluster)}
+        found, _ = bfs(blocked, local_width, toLocal(index), entrances.keys())
+        return {entrances[target]: distance for target, distance in found.items()}
+
+    def refine(self, one, two):     # cells from one to two, both in the same cluster
+        blocked, local_width, toLocal, toGlobal = self.local(self.clusterOf(one))
+        target = toLocal(two)
+        _, parents = bfs(blocked, local_width, toLocal(one), (target,))
+        path = [target]
+        while parents[path[-1]] is not None:
+            path.append(parents[path[-1]])
+        path.reverse()
+        return [toGlobal(index) for index in path]
+
+    def findPath(self, start, end):
+        # search the abstract graph from start to end, then refine it into cells,
+        # expanded counts abstract nodes, which is what stays small on big maps
+        source, target = self.index(start), self.index(end)
+        if self.blocked[source] or self.blocked[target]:
+            return SearchResult([], 0)
+        start_edges = self.connect(source)
+        end_edges = self.connect(target)
+        if self.clusterOf(source) == self.clusterOf(target):
+            blocked, local_width, toLocal, toGlobal = self.local(self.clusterOf(source))
+            found, _ = bfs(blocked, local_width, toLocal(source), (toLocal(target),))
+            if found:
+                start_edges[target] = found[toLocal(target)]
+        end_row, end_col = divmod(target, self.width)
+
+        def heuristic(index):
+            row, col = divmod(index, self.width)
+            return abs(row - end_row) + abs(col - end_col)
+
+        g_score = {source: 0}
+        came_from = {}
+        closed = set()
+        h = heuristic(source)
+        open_set = [(h, h, source)]
+        expanded = 0
+        while open_set:
+            _, _, current = heapq.heappop(open_set)
+            if current in closed:
+                continue
+            if current == target:
+                break
+            closed.add(current)
+            expanded += 1
+            edges = [(partner, 1) for partner in self.partners.get(current, ())]
+            if current == source:
+                edges += start_edges.items()
+            else:
+                edges += self.clusterEdges(self.clusterOf(current)).get(current, [])
+            if current in end_edges:
+                edges.append((target, end_edges[current]))
+            for neighbor, cost in edges:
+                temp_g_score = g_score[current] + cost
+                if neighbor in closed or temp_g_score >= g_score.get(neighbor, INF):
+                    continue
+                came_from[neighbor] = current
+                g_score[neighbor] = temp_g_score
+                h = heuristic(neighbor)
+                heapq.heappush(open_set, (temp_g_score + h, h, neighbor))
+        else:
+            return SearchResult([], expanded)
+
+        abstract = [target]
+        while abstract[-1] in came_from:
+            abstract.append(came_from[abstract[-1]])
+        abstract.reverse()
+        path = [source]
+        for one, two in zip(abstract, abstract[1:]):
+            if self.clusterOf(one) == self.clusterOf(two):
+                path += self.refine(one, two)[1:]
+            else:                   # across a border, the two cells are next to each other
+                path.append(two)
+        return SearchResult([self.pos(index) for index in path], expanded, len(path) - 1)
+
+    def updateCells(self, changes):
+        # changes maps (row, col) to True for a new barrier and False for a cleared one, only the clusters the
+        # cells are in (and their neighbours, if an entrance on a shared border moved) are rebuilt
+        dirty = set()
+        for pos, barrier in dict(changes).items():
+            index = self.index(pos)
+            if self.blocked[index] == bool(barrier):
+                continue
+            self.blocked[index] = bool(barrier)
+            dirty.add(self.clusterOf(index))
+        for cluster_row, cluster_col in set(dirty):
+            self.intra.pop((cluster_row, cluster_col), None)
+            if cluster_col + 1 < self.cluster_cols:
+                dirty |= self.scanBorder("v", cluster_row, cluster_col, min(self.size, self.rows - cluster_row * self.size))
+            if cluster_col > 0:
+                dirty |= self.scanBorder("v", cluster_row, cluster_col - 1, min(self.size, self.rows - cluster_row * self.size))
+            if cluster_row + 1 < self.cluster_rows:
+                dirty |= self.scanBorder("h", cluster_row, cluster_col, min(self.size, self.cols - cluster_col * self.size))
+            if cluster_row > 0:
+                dirty |= self.scanBorder("h", cluster_row - 1, cluster_col, min(self.size, self.cols - cluster_col * self.size))
+        for cluster in dirty:
+            self.intra.pop(cluster, None)
+        return dirty
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hierarchical A* on a random grid")
+    parser.add_argument("--size", type=int, default=4096)
+    parser.add_argument("--density", type=float, default=0.2, help="fraction of cells that are barriers")
+    parser.add_argument("--cluster", type=int, default=32, help="cluster side length")
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--build", action="store_true", help="build every cluster up front instead of as queries need them")
+    parser.add_argument("--compare", action="store_true", help="also run plain A* on each query")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    barriers = randomGrid(args.size, args.density, args.seed)
+    begin = time.perf_counter()
+    planner = HPAStar(barriers, args.cluster)
+    print("entrances found in {:.3f}s".format(time.perf_counter() - begin))
+    if args.build:
+        begin = time.perf_counter()
+        planner.build()
+        print("abstract graph built in {:.3f}s".format(time.perf_counter() - begin))
+
+    rng = random.Random(args.seed)
+    free = np.argwhere(~barriers)
+    for _ in range(args.queries):
+        start, end = (tuple(free[rng.randrange(len(free))].tolist()) for _ in range(2))
+        begin = time.perf_counter()
+        result = planner.findPath(start, end)
+        line = "{} -> {}: length {}, {} abstract nodes in {:.3f}s".format(start, end, len(result.path), result.expanded, time.perf_counter() - begin)
+        if args.compare:
+            begin = time.perf_counter()
+            exact = astar(barriers, start, end)
+            line += ", A* length {} in {:.3f}s".format(len(exact.path), time.perf_counter() - begin)
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
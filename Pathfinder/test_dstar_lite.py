@@ -0,0 +1,46 @@
+import numpy as np
+
+from dstar_lite import DStarLite
+from grid_search import astar
+
+
+def checkPath(barriers, path, start, end):      # 4-connected steps over free cells from start to end
+    assert path[0] == start and path[-1] == end
+    for (row, col), (next_row, next_col) in zip(path, path[1:]):
+        assert abs(next_row - row) + abs(next_col - col) == 1
+        assert not barriers[next_row, next_col]
+
+
+def test_repairs_match_astar_from_scratch():
+    # random cell flips and moves along the path, after every one the repaired path has to be
+    # as short as a fresh A* on the grid as it is now, and exist exactly when A* finds one
+    rng = np.random.default_rng(0)
+    for _ in range(150):
+        rows, cols = rng.integers(3, 30, 2)
+        barriers = rng.random((rows, cols)) < rng.uniform(0, 0.4)
+        free = np.argwhere(~barriers)
+        if len(free) < 2:
+            continue
+        start, end = (tuple(int(value) for value in cell) for cell in free[rng.choice(len(free), 2, replace=False)])
+        planner = DStarLite(barriers, start, end)
+        path = planner.path()
+
+        for _ in range(25):
+            if path and len(path) > 2 and rng.random() < 0.3:    # walk part of the way
+                start = path[int(rng.integers(1, len(path) - 1))]
+                path = planner.move(start)
+            else:
+                changes = {}
+                for _ in range(int(rng.integers(1, 6))):
+                    cell = (int(rng.integers(rows)), int(rng.integers(cols)))
+                    if cell not in (start, end):
+                        changes[cell] = not barriers[cell]
+                for cell, barrier in changes.items():
+                    barriers[cell] = barrier
+                path = planner.updateCells(changes)
+
+            expected = astar(barriers, start, end)
+            assert bool(path) == bool(expected.path), (start, end)
+            if path:
+                assert len(path) - 1 == expected.cost
+                checkPath(barriers, path, start, end)
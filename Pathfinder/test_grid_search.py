@@ -0,0 +1,97 @@
+import heapq
+import math
+
+import numpy as np
+
+from grid_search import SQRT2, astar, jps, weightedAstar
+
+
+def randomQuery(rng, rows, cols, density):      # random barriers and two distinct free cells
+    barriers = rng.random((rows, cols)) < density
+    free = np.argwhere(~barriers)
+    if len(free) < 2:
+        return barriers, (0, 0), (0, 0)
+    start, end = free[rng.choice(len(free), 2, replace=False)]
+    return barriers, tuple(int(value) for value in start), tuple(int(value) for value in end)
+
+
+def dijkstra(barriers, start, end, costs=None, diagonal=False):
+    # plain Dijkstra over the same moves as weightedAstar, the reference the searches are checked against
+    rows, cols = barriers.shape
+    steps = [(-1, 0), (1, 0), (0, -1), (0, 1)] + ([(-1, -1), (-1, 1), (1, -1), (1, 1)] if diagonal else [])
+    best = {start: 0.0}
+    heap = [(0.0, start)]
+    while heap:
+        distance, (row, col) = heapq.heappop(heap)
+        if (row, col) == end:
+            return distance
+        if distance > best[(row, col)]:
+            continue
+        for row_step, col_step in steps:
+            next_row, next_col = row + row_step, col + col_step
+            if not (0 <= next_row < rows and 0 <= next_col < cols) or barriers[next_row, next_col]:
+                continue
+            if row_step and col_step and (barriers[row + row_step, col] or barriers[row, col + col_step]):
+                continue
+            step = (SQRT2 if row_step and col_step else 1) * (1 if costs is None else costs[next_row, next_col])
+            if distance + step < best.get((next_row, next_col), math.inf):
+                best[(next_row, next_col)] = distance + step
+                heapq.heappush(heap, (distance + step, (next_row, next_col)))
+    return None
+
+
+def checkPath(barriers, result, start, end, costs=None, diagonal=False):
+    # every step is to a free neighbour, diagonals don't cut a barrier's corner and the steps add up to the cost
+    path = result.path
+    assert path[0] == start and path[-1] == end
+    total = 0.0
+    for (row, col), (next_row, next_col) in zip(path, path[1:]):
+        row_step, col_step = next_row - row, next_col - col
+        assert max(abs(row_step), abs(col_step)) == 1 and (diagonal or abs(row_step) + abs(col_step) == 1)
+        assert not barriers[next_row, next_col]
+        if row_step and col_step:
+            assert not barriers[row + row_step, col] and not barriers[row, col + col_step], "cut a corner"
+        total += (SQRT2 if row_step and col_step else 1) * (1 if costs is None else costs[next_row, next_col])
+    assert math.isclose(total, result.cost, abs_tol=1e-9)
+
+
+def test_jps_matches_eight_connected_astar():
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        rows, cols = rng.integers(2, 40, 2)
+        barriers, start, end = randomQuery(rng, rows, cols, rng.uniform(0, 0.45))
+        jumped = jps(barriers, start, end)
+        searched = weightedAstar(barriers, start, end, diagonal=True)
+        assert bool(jumped.path) == bool(searched.path), (start, end)
+        if searched.path:
+            assert math.isclose(jumped.cost, searched.cost, abs_tol=1e-9)
+            checkPath(barriers, jumped, start, end, diagonal=True)
+            checkPath(barriers, searched, start, end, diagonal=True)
+
+
+def test_weighted_costs_match_dijkstra():
+    rng = np.random.default_rng(1)
+    for _ in range(300):
+        rows, cols = rng.integers(2, 25, 2)
+        barriers, start, end = randomQuery(rng, rows, cols, rng.uniform(0, 0.35))
+        costs = rng.integers(1, 10, (rows, cols)).astype(float)
+        for diagonal in (False, True):
+            result = weightedAstar(barriers, start, end, costs, diagonal)
+            expected = dijkstra(barriers, start, end, costs, diagonal)
+            assert (expected is None) == (not result.path)
+            if result.path:
+                assert math.isclose(result.cost, expected, abs_tol=1e-9)
+                checkPath(barriers, result, start, end, costs, diagonal)
+
+
+def test_astar_matches_dijkstra():
+    rng = np.random.default_rng(2)
+    for _ in range(300):
+        rows, cols = rng.integers(2, 30, 2)
+        barriers, start, end = randomQuery(rng, rows, cols, rng.uniform(0, 0.4))
+        result = astar(barriers, start, end)
+        expected = dijkstra(barriers, start, end)
+        assert (expected is None) == (not result.path)
+        if result.path:
+            assert result.cost == expected
+            checkPath(barriers, result, start, end)
@@ -0,0 +1,53 @@
+import numpy as np
+
+from grid_search import astar
+from hpa_star import HPAStar
+
+
+def checkQuery(planner, barriers, start, end):
+    # HPA* paths can be a little longer than the shortest, but they have to be real paths and
+    # exist exactly when A* finds one
+    result = planner.findPath(start, end)
+    expected = astar(barriers, start, end)
+    assert bool(result.path) == bool(expected.path), (start, end)
+    if not result.path:
+        return
+    path = result.path
+    assert path[0] == start and path[-1] == end
+    for (row, col), (next_row, next_col) in zip(path, path[1:]):
+        assert abs(next_row - row) + abs(next_col - col) == 1
+        assert not barriers[next_row, next_col]
+    assert result.cost == len(path) - 1 >= expected.cost
+
+
+def freeCell(rng, barriers):
+    free = np.argwhere(~barriers)
+    return tuple(int(value) for value in free[rng.integers(len(free))])
+
+
+def test_updates_match_a_fresh_build():
+    rng = np.random.default_rng(0)
+    for _ in range(60):
+        rows, cols = rng.integers(4, 40, 2)
+        cluster_size = int(rng.integers(3, 9))
+        barriers = rng.random((rows, cols)) < rng.uniform(0, 0.35)
+        if barriers.all():
+            continue
+        planner = HPAStar(barriers, cluster_size)
+
+        for _ in range(15):
+            changes = {}
+            for _ in range(int(rng.integers(1, 8))):
+                cell = (int(rng.integers(rows)), int(rng.integers(cols)))
+                changes[cell] = not barriers[cell]
+            for cell, barrier in changes.items():
+                barriers[cell] = barrier
+            planner.updateCells(changes)
+
+            fresh = HPAStar(barriers, cluster_size)
+            assert planner.borders == fresh.borders
+            assert {cell: sorted(others) for cell, others in planner.partners.items()} == {cell: sorted(others) for cell, others in fresh.partners.items()}     # the order depends on which border was scanned last
+            if barriers.all():
+                continue
+            for _ in range(3):
+                checkQuery(planner, barriers, freeCell(rng, barriers), freeCell(rng, barriers))
@@ -1,10 +1,11 @@
+import argparse
 import pygame
 import math
-from queue import PriorityQueue
+import time
+from grid_search import astar
+from dstar_lite import DStarLite
 
 WIDTH = 800
-WIN = pygame.display.set_mode((WIDTH, WIDTH))
-pygame.display.set_caption("A* Path Finding Algorithm")
 
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -18,7 +19,7 @@ TURQUOISE = (64, 224, 208)
 YELLOW = (255, 255, 0)
 
 class Node:         # keeps track of where it is, different types of nodes etc..
-    def __init__(self, row, col, width, total_rows):
+    def __init__(self, row, col, width, total_rows, dirty=None):
         self.row = row
         self.col = col
         self.x = row * width
@@ -27,6 +28,9 @@ class Node:         # keeps track of where it is, different types of nodes etc..
         self.neighbors = []
         self.width = width
         self.total_rows = total_rows
+        self.dirty = dirty          # shared list of nodes whose colour changed since the last frame
+        inset = 1 if width >= 4 else 0      # leave the grid lines of the background showing
+        self.rect = pygame.Rect(self.x + inset, self.y + inset, width - inset, width - inset)
     
     def getPos(self):
         return self.row, self.col
@@ -46,29 +50,34 @@ class Node:         # keeps track of where it is, different types of nodes etc..
     def isEnd(self):
         return self.colour == PURPLE
     
+    def paint(self, colour):
+        if colour != self.colour and self.dirty is not None:
+            self.dirty.append(self)
+        self.colour = colour
+
     def reset(self):
-        self.colour = WHITE
+        self.paint(WHITE)
     
     def makeClosed(self):
-        self.colour = RED
+        self.paint(RED)
     
     def makeOpen(self):
-        self.colour = GREEN
+        self.paint(GREEN)
     
     def makeBarrier(self):
-        self.colour = BLACK
+        self.paint(BLACK)
     
     def makeStart(self):
-        self.colour = ORANGE
+        self.paint(ORANGE)
     
     def makeEnd(self):
-        self.colour = PURPLE
+        self.paint(PURPLE)
     
     def makePath(self):
-        self.colour = TURQUOISE
+        self.paint(TURQUOISE)
     
     def draw(self, win):
-        pygame.draw.rect(win, self.colour, (self.x, self.y, self.width, self.width))
+        win.fill(self.colour, self.rect)
     
     def updateNeighbors(self, grid):
         self.neighbors = []
@@ -92,85 +101,122 @@ def heuristic(p1, p2):          # using manhattan distance to calculate distance
     x2, y2 = p2
     return abs(x1 - x2) + abs(y1 - y2)
 
-def changePath(came_from, current, draw):   # the current node starts at the end node
-    while current in came_from:             # we're gonna traverse from the end node back to start node
-        current = came_from[current]
-        current.makePath()                  # make that part of the path
+def changePath(path, draw):                 # path runs from the start node to the end node
+    for node in path[1:-1]:                 # make every node between them part of the path
+        node.makePath()
         draw()
 
-def algorithm(draw, grid, start, end):
-    count = 0
-    open_set = PriorityQueue()
-    open_set.put((0, count, start))      # count variable so we can break ties when we have two elements in the queue that have the same f-score
-    came_from = {}                       # keeps track of what nodes come from where to find best path in the end
-    g_score = {spot: float("inf") for row in grid for spot in row}      # keeps track of current shortest distance from start node to this node
-    g_score[start] = 0
-    f_score = {spot: float("inf") for row in grid for spot in row}         # keeps track of the predicted of this node to the end node
-    f_score[start] = heuristic(start.getPos(), end.getPos())                # set start of f_score at heuristic(whatever our guess is) from start node to end node
+def algorithm(draw, grid, start, end, final_only=False):
+    barriers = [[node.isBarrier() for node in row] for row in grid]     # the search itself runs headless in grid_search
 
-    open_set_hash = {start}             # helps us see whats in the open_set
+    def onOpen(pos):
+        row, col = pos
+        grid[row][col].makeOpen()
 
-    while not open_set.empty():
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-        
-        current = open_set.get()[2]     # getting the node associated with the minimum element in the queue
-        open_set_hash.remove(current)
-
-        if current == end:                          # if we're at the end/finished, found the path, we're done
-            changePath(came_from, end, draw)
-            end.makeEnd()
-            start.makeEnd()
-            return True
-
-        for neighbor in current.neighbors:          # otherwise, consider all neighbors of current node
-            temp_g_score = g_score[current] + 1     # calculate their temp g_score
-
-            if temp_g_score < g_score[neighbor]:    # if less then whatever their g_score is on the table
-                came_from[neighbor] = current       # then update that, because we found the better path
-                g_score[neighbor] = temp_g_score
-                f_score[neighbor] = temp_g_score + heuristic(neighbor.getPos(), end.getPos())
-                if neighbor not in open_set_hash:   # then add in the open_set hash if they're not already in there
-                    count += 1
-                    open_set.put((f_score[neighbor], count, neighbor))
-                    open_set_hash.add(neighbor)
-                    neighbor.makeOpen()
-        
+    def onClose(pos):                       # called once per expanded node, draw decides whether a frame is due
+        row, col = pos
+        if grid[row][col] != start:
+            grid[row][col].makeClosed()
         draw()
 
-        if current != start:
-            current.makeClosed()
-    
-    return False
-
-def makeGrid(rows, width):
+    if final_only:                          # skip colouring the search, just show the path
+        result = astar(barriers, start.getPos(), end.getPos())
+    else:
+        result = astar(barriers, start.getPos(), end.getPos(), onOpen, onClose)
+    if not result.path:
+        return []
+
+    changePath([grid[row][col] for row, col in result.path], draw)
+    end.makeEnd()
+    start.makeEnd()
+    return result.path
+
+def clearPath(grid, path):                  # take a drawn path off the grid, leaving any barriers placed on it since
+    for row, col in path[1:-1]:
+        if not grid[row][col].isBarrier():
+            grid[row][col].reset()
+
+def repairPath(planner, grid, changes, path, start, end):       # barrier edits after a search fix up the drawn path instead of searching again
+    clearPath(grid, path)                   # path is whatever is on screen, A*'s after a search and D* Lite's after that
+    if planner is None:                     # first edit since the search, D* Lite only gets built once it's needed
+        planner = DStarLite([[node.isBarrier() for node in row] for row in grid], start.getPos(), end.getPos())
+        path = planner.path()
+    else:
+        path = planner.updateCells(changes)
+    for row, col in path[1:-1]:
+        grid[row][col].makePath()
+    return planner, path
+
+def makeGrid(rows, width, dirty=None):
     grid = []
     gap = width // rows
     for i in range(rows):
         grid.append([])
         for j in range(rows):
-            node = Node(i, j, gap, rows)
+            node = Node(i, j, gap, rows, dirty)
             grid[i].append(node)
 
     return grid
 
 def gridLines(win, rows, width):
     gap = width // rows
+    if gap < 4:                     # lines would cover the cells completely
+        return
     for i in range(rows):
         pygame.draw.line(win, GREY, (0, i * gap), (width, i * gap))
-        for j in range(rows):
-            pygame.draw.line(win, GREY, (j * gap, 0), (j * gap, width))
+        pygame.draw.line(win, GREY, (i * gap, 0), (i * gap, width))
 
-def draw(win, grid, rows, width):
-    win.fill(WHITE)
+class Renderer:     # only redraws the cells that changed colour, never more often than fps
+    def __init__(self, win, rows, width, fps=60):
+        self.win = win
+        self.rows = rows
+        self.width = width
+        self.fps = fps
+        self.clock = pygame.time.Clock()
+        self.dirty = []
+        self.next_frame = 0
+        self.background = pygame.Surface(win.get_size())       # white grid with its lines, drawn once
+        self.background.fill(WHITE)
+        gridLines(self.background, rows, width)
+
+    def makeGrid(self):
+        self.dirty.clear()
+        return makeGrid(self.rows, self.width, self.dirty)
+
+    def redraw(self, grid):         # whole window, after a reset
+        self.dirty.clear()
+        self.win.blit(self.background, (0, 0))
+        for row in grid:
+            for node in row:
+                if node.colour != WHITE:
+                    node.draw(self.win)
+        pygame.display.update()
+
+    def flush(self):                # push the changed cells to the screen
+        if not self.dirty:
+            return
+        nodes = set(self.dirty)
+        self.dirty.clear()
+        for node in nodes:
+            node.draw(self.win)
+        if len(nodes) > 2000:       # past this one full update is cheaper than a rect per cell
+            pygame.display.update()
+        else:
+            pygame.display.update([node.rect for node in nodes])
+
+    def step(self):                 # called for every search step, only draws once a frame is due so the search isn't held up
+        now = time.perf_counter()
+        if now < self.next_frame:
+            return
+        self.next_frame = now + 1 / self.fps
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+        self.flush()
 
-    for row in grid:
-        for node in row:
-            node.draw(win)
-    
-    gridLines(win, rows, width)
-    pygame.display.update()
+    def tick(self):                 # end of an idle frame, sleeps to keep to fps
+        self.flush()
+        self.clock.tick(self.fps)
 
 def mousePos(pos, rows, width):
     gap = width // rows
@@ -181,16 +227,20 @@ def mousePos(pos, rows, width):
 
     return row, col
 
-def main(win, width):
-    rows = 50
-    grid = makeGrid(rows, width)
+def main(win, width, rows=50, fps=60, final_only=False):
+    renderer = Renderer(win, rows, width, fps)
+    grid = renderer.makeGrid()
+    renderer.redraw(grid)
 
     start = None
     end = None
+    planner = None          # kept after the first edit following a search so later edits repair the path
+    path = []               # the path drawn on the grid
+    searched = False
     run = True
 
     while run:
-        draw(win, grid, rows, width)
+        renderer.tick()
         for event in pygame.event.get():        # events are anything that is clicked/pressed mouse/keyboard or timer went off
             if event.type == pygame.QUIT:
                 run = False
@@ -209,6 +259,8 @@ def main(win, width):
 
                 elif node != end and node != start:
                     node.makeBarrier()
+                    if searched:
+                        planner, path = repairPath(planner, grid, {node.getPos(): True}, path, start, end)
 
             elif pygame.mouse.get_pressed()[2]: # right mouse button
                 pos = pygame.mouse.get_pos()
@@ -218,22 +270,39 @@ def main(win, width):
                 
                 if node == start:
                     start = None
+                    planner, searched = None, False
                 elif node == end:
                     end = None
+                    planner, searched = None, False
+                elif searched:
+                    planner, path = repairPath(planner, grid, {node.getPos(): False}, path, start, end)
 
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE and start and end:
-                    for row in grid:
-                        for node in row:
-                            node.updateNeighbors(grid)
-
-                    algorithm(lambda: draw(win, grid, rows, width), grid, start, end)
+                    clearPath(grid, path)           # only the new path is left turquoise
+                    path = algorithm(renderer.step, grid, start, end, final_only)
+                    planner, searched = None, True
 
                 if event.key == pygame.K_f:
                     start = None
                     end = None
-                    grid = makeGrid(rows, width)
+                    planner, searched = None, False
+                    path = []
+                    grid = renderer.makeGrid()
+                    renderer.redraw(grid)
+
+                if event.key == pygame.K_v:
+                    final_only = not final_only
 
     pygame.quit()
 
-main(WIN, WIDTH)
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="A* path finding in a window")
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--final-only", action="store_true", help="only show the finished path, not the search (toggle with V)")
+    args = parser.parse_args()
+
+    WIN = pygame.display.set_mode((WIDTH, WIDTH))
+    pygame.display.set_caption("A* Path Finding Algorithm")
+    main(WIN, WIDTH, args.rows, args.fps, args.final_only)
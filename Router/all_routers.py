@@ -0,0 +1,105 @@
+import argparse
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+from csr_graph import CSRGraph
+from router import Graph
+
+_graph = None  # read only graph each worker builds over the shared memory once
+
+
+def _padded(size):
+    return (size + 7) // 8 * 8  # keep every array on an 8 byte boundary
+
+
+def share_graph(graph):
+    # copy the CSR arrays into one shared memory block: offsets | targets | weights
+    sizes = [len(graph.offsets) * 8, len(graph.targets) * 4, len(graph.weights) * 8]
+    block = shared_memory.SharedMemory(create=True, size=max(1, sum(_padded(size) for size in sizes)))
+    position = 0
+    for values, size in zip((graph.offsets, graph.targets, graph.weights), sizes):
+        block.buf[position:position + size] = values.tobytes()
+        position += _padded(size)
+    return block
+
+
+def _attach(name, node_count, edge_count):
+    # runs once in every worker, the arrays are views into the shared block so nothing is copied
+    global _graph
+    block = shared_memory.SharedMemory(name=name)
+    offsets_end = (node_count + 1) * 8
+    targets_start = _padded(offsets_end)
+    weights_start = targets_start + _padded(edge_count * 4)
+    offsets = block.buf[:offsets_end].cast("q")
+    targets = block.buf[targets_start:targets_start + edge_count * 4].cast("i")
+    weights = block.buf[weights_start:weights_start + edge_count * 8].cast("d")
+    _graph = CSRGraph([None] * node_count, offsets, targets, weights)
+    _graph.block = block  # keep the mapping open for as long as the worker lives
+
+
+def _shard(sources):
+    results = []
+    for source in sources:
+        distances, parents = _graph.dijkstra(source)
+        results.append((source, distances.tobytes(), parents.tobytes()))
+    return results
+
+
+def routing_tables(graph, sources=None, processes=None, shard_size=64):
+    # compute the shortest path tree of every router (or just sources) across a process pool,
+    # yields (source, distances, parents) arrays indexed by node id as each shard finishes
+    if isinstance(graph, Graph):
+        graph = CSRGraph.from_graph(graph)
+    source_ids = range(len(graph)) if sources is None else [graph.ids[source] for source in sources]
+    shards = [source_ids[index:index + shard_size] for index in range(0, len(source_ids), shard_size)]
+
+    block = share_graph(graph)
+    try:
+        with ProcessPoolExecutor(max_workers=processes or os.cpu_count(), initializer=_attach,
+                                 initargs=(block.name, len(graph), graph.edge_count())) as pool:
+            jobs = [pool.submit(_shard, list(shard)) for shard in shards]
+            for job in as_completed(jobs):
+                for source, distances, parents in job.result():
+                    distance_array = array("d")
+                    distance_array.frombytes(distances)
+                    parent_array = array("i")
+                    parent_array.frombytes(parents)
+                    yield graph.names[source], distance_array, parent_array
+    finally:
+        block.close()
+        block.unlink()
+
+
+def table_rows(graph, start, distances, parents):
+    # (destination, cost, path) for every other router, in the same shape as Router.print_routing_table()
+    start_id = graph.ids[start]
+    for node_id, name in enumerate(graph.names):
+        if node_id == start_id:
+            continue
+        if parents[node_id] == -1:
+            yield name, float("inf"), ["Path", "Removed"]
+            continue
+        path = [node_id]
+        while path[-1] != start_id:
+            path.append(parents[path[-1]])
+        yield name, distances[node_id], [graph.names[step] for step in reversed(path)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the routing table of every router in an edge list file")
+    parser.add_argument("edges", help="file with one 'node_one node_two weight' edge per line")
+    parser.add_argument("-j", "--processes", type=int, default=None, help="worker processes, defaults to the number of cores")
+    args = parser.parse_args()
+
+    graph = CSRGraph.from_file(args.edges)
+    for start, distances, parents in routing_tables(graph, processes=args.processes):
+        print("{:>6}{:>3}{:>5}{:>20}".format("from", "to", "cost", "path"))
+        for index, (node, cost, path) in enumerate(table_rows(graph, start, distances, parents)):
+            print("{}{:>5}{:>3}{:>5}{:>20}".format(index, start, node, cost, " -> ".join(path)))
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import heapq
+from array import array
+from types import SimpleNamespace
+
+try:
+    import profiling
+except ImportError:  # not started through profiling.py, so the hooks do nothing
+    profiling = SimpleNamespace(count=lambda name, amount=1: None, timer=lambda name: lambda function: function)
+
+
+class CSRGraph:
+    # compressed sparse row graph, node names are interned to ids 0..n-1 and the
+    # edges leaving node i are targets[offsets[i]:offsets[i + 1]] with the same slice of weights,
+    # an edge costs 12 bytes (4 byte target + 8 byte weight) instead of a dict entry
+    def __init__(self, names, offsets, targets, weights):
+        self.names = names  # id -> name
+        self.ids = {name: node_id for node_id, name in enumerate(names)}  # name -> id
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+
+    @classmethod
+    def from_edges(cls, edges, nodes=()):
+        # O(E) bulk build from an iterable of (node_one, node_two, weight), parallel edges are kept,
+        # nodes can list names that have no edges so they still get an id
+        ids = {}
+        names = []
+        for name in nodes:
+            if name not in ids:
+                ids[name] = len(names)
+                names.append(name)
+        sources = array("i")
+        targets = array("i")
+        weights = array("d")
+        for node_one, node_two, weight in edges:
+            for name in (node_one, node_two):
+                if name not in ids:
+                    ids[name] = len(names)
+                    names.append(name)
+            sources.append(ids[node_one])
+            targets.append(ids[node_two])
+            weights.append(weight)
+
+        # counting sort of the edges by source node
+        offsets = array("q", [0]) * (len(names) + 1)
+        for source in sources:
+            offsets[source + 1] += 1
+        for node_id in range(len(names)):
+            offsets[node_id + 1] += offsets[node_id]
+
+        position = array("q", offsets[:-1])  # next free slot for each source
+        sorted_targets = array("i", [0]) * len(targets)
+        sorted_weights = array("d", [0]) * len(weights)
+        for index, source in enumerate(sources):
+            slot = position[source]
+            sorted_targets[slot] = targets[index]
+            sorted_weights[slot] = weights[index]
+            position[source] = slot + 1
+
+        return cls(names, offsets, sorted_targets, sorted_weights)
+
+    @classmethod
+    def from_graph(cls, graph):
+        # convert a dict backed Graph, leaving out the self loops Graph.add_edge puts in
+        edges = (
+            (node_one, node_two, weight)
+            for node_one, neighbours in graph.edges.items()
+            for node_two, weight in neighbours.items()
+            if node_one != node_two
+        )
+        return cls.from_edges(edges, nodes=graph.nodes)
+
+    @classmethod
+    def from_file(cls, path):
+        # one "node_one node_two weight" edge per line, blank lines and lines starting with # are skipped
+        def edges():
+            with open(path) as f:
+                for line in f:
+                    fields = line.split()
+                    if fields and not fields[0].startswith("#"):
+                        yield fields[0], fields[1], float(fields[2])
+        return cls.from_edges(edges())
+
+    @property
+    def nodes(self):
+        return self.names
+
+    def __len__(self):
+        return len(self.names)
+
+    def edge_count(self):
+        return len(self.targets)
+
+    def neighbours(self, node_id):
+        for index in range(self.offsets[node_id], self.offsets[node_id + 1]):
+            yield self.targets[index], self.weights[index]
+
+    @profiling.timer("csr_graph.dijkstra")
+    def dijkstra(self, source):
+        # single source shortest paths straight over the arrays,
+        # returns distance and parent arrays indexed by node id, parent is -1 for the source and unreachable nodes
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        distances = array("d", [float("inf")]) * len(self.names)
+        parents = array("i", [-1]) * len(self.names)
+        distances[source] = 0
+        heap = [(0.0, source)]
+        pops = 0
+        while heap:
+            distance, node = heapq.heappop(heap)
+            pops += 1
+            if distance > distances[node]:  # stale entry, a shorter one was already popped
+                continue
+            for index in range(offsets[node], offsets[node + 1]):
+                neighbour = targets[index]
+                new_distance = distance + weights[index]
+                if new_distance < distances[neighbour]:
+                    distances[neighbour] = new_distance
+                    parents[neighbour] = node
+                    heapq.heappush(heap, (new_distance, neighbour))
+        profiling.count("csr_graph.dijkstra.pops", pops)
+        return distances, parents
+
+    def shortest_paths(self, start):
+        # same result as Router.dijkstra() so a Router can use this graph directly
+        names = self.names
+        distances, parents = self.dijkstra(self.ids[start])
+        reached = {names[node_id]: distance for node_id, distance in enumerate(distances) if distance != float("inf")}
+        tree = {names[node_id]: names[parent] for node_id, parent in enumerate(parents) if parent != -1}
+        return reached, tree
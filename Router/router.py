@@ -1,7 +1,20 @@
+import heapq
+import weakref
+from collections import OrderedDict
+from types import SimpleNamespace
+
+try:
+    import profiling
+except ImportError:  # profiling.py puts itself in sys.modules, run any other way the hooks are no-ops
+    profiling = SimpleNamespace(count=lambda name, amount=1: None, timer=lambda name: lambda function: function)
+
 class Graph:
     def __init__(self):
         self.edges = {}     # edges will look like {"a": {"b": 7, "c": 9}, "b": {"f": 5}}
         self.nodes = set()  # set of nodes will look like ("a", "b", "c"... etc)
+        self.reverse_edges = {}  # same as edges but keyed by the destination, {"b": {"a": 7}}
+        self.routers = weakref.WeakSet()  # routers keeping a shortest path tree over this graph
+        self.version = 0  # goes up by one on every change to the topology
 
     def add_edge(self, node_one, node_two, weight):
         # creating set of nodes used
@@ -11,84 +24,276 @@ class Graph:
             self.nodes.add(node_two)
 
         # creating nested dictionary of all edges
+        old_weight = self.edges.get(node_one, {}).get(node_two)
         if node_one not in self.edges:
             self.edges[node_one] = {node_one: 0, node_two: weight}
         else:
-            for node_id, node_info in self.edges.items():
-                if node_id == node_one:
-                    self.edges[node_id][node_two] = weight
+            self.edges[node_one][node_two] = weight
+        self.reverse_edges.setdefault(node_two, {})[node_one] = weight
+        self.notify([(node_one, node_two, old_weight, weight)])
+
+    def remove_edge(self, node_one, node_two):
+        weight = self.edges.get(node_one, {}).pop(node_two, None)
+        self.reverse_edges.get(node_two, {}).pop(node_one, None)
+        if weight is not None:
+            self.notify([(node_one, node_two, weight, None)])
+
+    def remove_node(self, node):
+        # drop every edge in and out of node, then tell the routers about all of them at once
+        changes = [(node, neighbour, weight, None) for neighbour, weight in self.edges.pop(node, {}).items() if neighbour != node]
+        changes += [(neighbour, node, weight, None) for neighbour, weight in self.reverse_edges.pop(node, {}).items() if neighbour != node]
+        for node_one, node_two, _, _ in changes:
+            self.edges.get(node_one, {}).pop(node_two, None)
+            self.reverse_edges.get(node_two, {}).pop(node_one, None)
+        self.nodes.discard(node)
+        self.notify(changes)
+
+    def watch(self, router):
+        self.routers.add(router)
+
+    def notify(self, changes):
+        # changes are (node_one, node_two, old_weight, new_weight), None meaning the edge isn't there
+        self.version += 1
+        for router in list(self.routers):
+            router.graph_changed(changes)
+
+class RouteCache:
+    # LRU cache of (path, cost) keyed by (start, destination), every start remembers the graph version its
+    # entries are good for, a change drops only the destinations whose route changed and moves that version on,
+    # so the entries left keep their place in the LRU order
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.versions = {}  # start -> graph version its entries are valid for
+        self.held = {}  # start -> destinations with an entry, so a whole start can be dropped
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, start, destination, version):
+        key = (start, destination)
+        if self.versions.get(start) == version and key in self.entries:
+            self.hits += 1
+            profiling.count("route_cache.hits")
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.misses += 1
+        profiling.count("route_cache.misses")
+        return None
+
+    def put(self, start, destination, version, value):
+        if self.versions.get(start) != version:  # entries from an older version were never advanced, none of them can be trusted
+            self.advance(start, version)
+        key = (start, destination)
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        self.held.setdefault(start, set()).add(destination)
+        while len(self.entries) > self.maxsize:
+            (old_start, old_destination), _ = self.entries.popitem(last=False)
+            self.held[old_start].discard(old_destination)
+
+    def advance(self, start, version, affected=None):
+        # the graph is now at version, drop start's entries for the destinations in affected, all of them if None
+        held = self.held.get(start, set())
+        for destination in list(held) if affected is None else affected:
+            if destination in held:
+                held.discard(destination)
+                del self.entries[(start, destination)]
+        self.versions[start] = version
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries)}
 
 class Router:
-    def __init__(self, start, graph):
+    def __init__(self, start, graph, cache=None):
         self.start = start
         self.graph = graph
+        self.cache = RouteCache() if cache is None else cache  # can be shared between routers
+        self.distances = None  # shortest path tree, built on first use and then kept up to date
+        self.parents = None
+        self.children = None
+        self.changed = {}  # routing table entries changed by the last graph update, {node: (old cost, new cost)}
+        if hasattr(graph, "watch"):
+            graph.watch(self)
 
     @staticmethod
     def generate_path(parents, start, end):
         try:    # keep going even if there is no path
             path = [end]
-            while True:
-                key = parents[path[0]]
-                path.insert(0, key)
-                if key == start:
-                    break
+            while path[-1] != start:
+                path.append(parents[path[-1]])
+            path.reverse()
             return path
         except KeyError:    # if a connection was cut off by remove_router()
             return ["Path", "Removed"]
 
-    def dijkstra(self, router_name, edges):
-        unvisited = {n: float("inf") for n in self.graph.nodes}
-        unvisited[self.start] = 0  # set start vertex to 0
-        visited = {}  # list of all visited nodes
-        parents = {}  # predecessors
-        while unvisited:
-            min_vertex = min(unvisited, key=unvisited.get)  # get smallest distance
-            for neighbour, _ in edges.get(min_vertex, {}).items():
-                if neighbour in visited:
-                    continue
-                new_distance = unvisited[min_vertex] + edges[min_vertex].get(neighbour, float("inf"))
-                if new_distance < unvisited[neighbour]:
-                    unvisited[neighbour] = new_distance
+    @profiling.timer("router.dijkstra")
+    def dijkstra(self, edges):
+        distances = {self.start: 0}  # shortest distance found so far to every node reached
+        parents = {}  # predecessors, the shortest path tree for every destination
+        visited = set()
+        heap = [(0, self.start)]
+        pops = 0
+        while heap:
+            distance, min_vertex = heapq.heappop(heap)  # get smallest distance
+            pops += 1
+            if min_vertex in visited:  # stale entry, a shorter one was already popped
+                continue
+            visited.add(min_vertex)
+            for neighbour, weight in edges.get(min_vertex, {}).items():
+                new_distance = distance + weight
+                if new_distance < distances.get(neighbour, float("inf")):
+                    distances[neighbour] = new_distance
                     parents[neighbour] = min_vertex
-            visited[min_vertex] = unvisited[min_vertex]
-            unvisited.pop(min_vertex)
-            if min_vertex == router_name:
-                break
-        
+                    heapq.heappush(heap, (new_distance, neighbour))
+
+        profiling.count("router.dijkstra.pops", pops)
+        return distances, parents
+
+    def shortest_paths(self):
+        if self.distances is None:
+            # array backed graphs like CSRGraph run the search over their own arrays
+            if hasattr(self.graph, "shortest_paths"):
+                self.distances, self.parents = self.graph.shortest_paths(self.start)
+            else:
+                self.distances, self.parents = self.dijkstra(self.graph.edges)
+            self.children = {}
+            for node, parent in self.parents.items():
+                self.children.setdefault(parent, set()).add(node)
+        return self.distances, self.parents
+
+    def set_parent(self, node, parent):
+        old_parent = self.parents.pop(node, None)
+        if old_parent is not None:
+            self.children[old_parent].discard(node)
+        if parent is not None:
+            self.parents[node] = parent
+            self.children.setdefault(parent, set()).add(node)
+
+    def subtree(self, node):
+        # node and everything whose shortest path goes through it
+        nodes = [node]
+        for current in nodes:
+            nodes.extend(self.children.get(current, ()))
+        return nodes
+
+    @profiling.timer("router.graph_changed")
+    def graph_changed(self, changes):
+        # repair only the part of the tree the changes touch, the usual dynamic SSSP approach:
+        # tree edges that got dearer or went away cut off a subtree which is reset and rebuilt
+        # from the nodes around it, edges that got cheaper are relaxed, then Dijkstra runs from there
+        if self.distances is None:  # no tree yet, it will be built from the new graph when needed
+            self.changed = {}
+            self.cache.advance(self.start, self.graph.version)
+            return self.changed
+        distances, parents = self.distances, self.parents
+        infinity = float("inf")
+        before = {}  # old cost and parent of every node touched
+
+        if self.start not in self.graph.nodes:  # this router itself was removed
+            self.changed = {node: (cost, infinity) for node, cost in distances.items()}
+            self.distances, self.parents, self.children = None, None, None  # rebuilt from scratch if it comes back
+            self.cache.advance(self.start, self.graph.version)
+            return self.changed
+
+        affected = set()
+        for node_one, node_two, old_weight, new_weight in changes:
+            if old_weight is not None and (new_weight is None or new_weight > old_weight) and parents.get(node_two) == node_one:
+                affected.update(self.subtree(node_two))
+        for node in affected:
+            before[node] = (distances.pop(node, infinity), parents.get(node))
+            self.set_parent(node, None)
+
+        heap = []
+        for node in affected:  # best way back into the cut off subtree from outside it
+            if node not in self.graph.nodes:
+                continue
+            for neighbour, weight in self.graph.reverse_edges.get(node, {}).items():
+                new_distance = distances.get(neighbour, infinity) + weight
+                if new_distance < distances.get(node, infinity):
+                    distances[node] = new_distance
+                    self.set_parent(node, neighbour)
+            if node in distances:
+                heapq.heappush(heap, (distances[node], node))
+        for node_one, node_two, old_weight, new_weight in changes:
+            if new_weight is not None and node_two != node_one:  # edges that are new or cheaper
+                new_distance = distances.get(node_one, infinity) + new_weight
+                if new_distance < distances.get(node_two, infinity):
+                    before.setdefault(node_two, (distances.get(node_two, infinity), parents.get(node_two)))
+                    distances[node_two] = new_distance
+                    self.set_parent(node_two, node_one)
+                    heapq.heappush(heap, (new_distance, node_two))
+
+        pops = 0
+        while heap:
+            distance, node = heapq.heappop(heap)
+            pops += 1
+            if distance > distances.get(node, infinity):  # stale entry
+                continue
+            for neighbour, weight in self.graph.edges.get(node, {}).items():
+                new_distance = distance + weight
+                if new_distance < distances.get(neighbour, infinity):
+                    before.setdefault(neighbour, (distances.get(neighbour, infinity), parents.get(neighbour)))
+                    distances[neighbour] = new_distance
+                    self.set_parent(neighbour, node)
+                    heapq.heappush(heap, (new_distance, neighbour))
+        profiling.count("router.graph_changed.pops", pops)
+
+        # an entry changed if its cost or path did, and a path changes when any node on it got a new parent
+        moved = [node for node, (cost, parent) in before.items() if (cost, parent) != (distances.get(node, infinity), parents.get(node))]
+        self.changed = {}
+        for node in moved:
+            for changed_node in self.subtree(node):
+                self.changed[changed_node] = (before.get(changed_node, (distances.get(changed_node, infinity),))[0], distances.get(changed_node, infinity))
+        self.cache.advance(self.start, self.graph.version, self.changed)
+        return self.changed
+
+    def route(self, router_name, distances, parents):
+        # path and cost to one destination from an already computed tree
         path = self.generate_path(parents, self.start, router_name)
+        return path, distances.get(router_name, float("inf"))
+
+    def lookup(self, router_name):
+        # cached path and cost, the tree is only searched on a miss
+        version = getattr(self.graph, "version", 0)
+        cached = self.cache.get(self.start, router_name, version)
+        if cached is None:
+            cached = self.route(router_name, *self.shortest_paths())
+            self.cache.put(self.start, router_name, version, cached)
+        return cached
 
-        return path, visited[router_name]
-    
     def get_path(self, router_name):
         # getting the path and cost using dijkstras algorithm
-        path, cost = self.dijkstra(router_name, self.graph.edges)
+        path, cost = self.lookup(router_name)
         return print("Start: {}\nEnd: {}\nPath: {}\nCost: {}".format(self.start, router_name, " -> ".join(path), cost))
 
     def print_routing_table(self):
+        distances, parents = self.shortest_paths()  # one run gives the path to every destination
         print("{:>6}{:>3}{:>5}{:>20}".format("from", "to", "cost", "path"))
         index = 0
         for _, node in enumerate(self.graph.nodes):
             if node != self.start:
-                path, cost = self.dijkstra(node, self.graph.edges)
+                path, cost = self.route(node, distances, parents)
                 print("{}{:>5}{:>3}{:>5}{:>20}".format(index, self.start, node, cost," -> ".join(path)))
                 index += 1
 
     def remove_router(self, router_name):
-        self.graph.nodes.remove(router_name)
-        del self.graph.edges[router_name]
-        for node_id, node_info in self.graph.edges.items():
-            try:
-                for info in node_info:
-                    if info == router_name:
-                        del self.graph.edges[node_id][info]
-            except RuntimeError:
-                continue
+        self.graph.remove_node(router_name)  # every router on the graph repairs its own tree
 
+        distances, parents = self.shortest_paths()
         print("{:>6}{:>3}{:>5}{:>20}".format("from", "to", "cost", "path"))
         for id, node in enumerate(self.graph.nodes):
             if node != self.start:
-                path, cost = self.dijkstra(node, self.graph.edges)
+                path, cost = self.route(node, distances, parents)
                 print("{}{:>5}{:>3}{:>5}{:>20}".format(id, self.start, node, cost," -> ".join(path)))
+        return self.changed
+
+    def remove_link(self, node_one, node_two):
+        self.graph.remove_edge(node_one, node_two)
+        return self.changed
+
+    def set_link_weight(self, node_one, node_two, weight):
+        self.graph.add_edge(node_one, node_two, weight)
+        return self.changed
 
 
 def main():
@@ -120,6 +325,7 @@ def main():
     print("-----New Routing Table For Router Two-----\n")
     router_two.print_routing_table()
 
-main()
+if __name__ == "__main__":
+    main()
 
 # https://stackoverflow.com/questions/22897209/dijkstras-algorithm-in-python was used to help with Router.dijkstra() and Router.generate_path()
\ No newline at end of file
@@ -0,0 +1,81 @@
+import random
+
+from router import Graph, RouteCache, Router
+
+NAMES = "abcdefgh"
+
+
+def path_cost(graph, path):
+    return sum(graph.edges[node_one][node_two] for node_one, node_two in zip(path, path[1:]))
+
+
+def check(graph, routers):
+    # every kept up to date router must agree with a tree built from scratch on the current graph
+    for router in routers:
+        fresh = Router(router.start, graph, RouteCache())
+        for destination in NAMES:
+            path, cost = router.lookup(destination)
+            expected_path, expected_cost = fresh.lookup(destination)
+            assert cost == expected_cost, (router.start, destination, path, cost, expected_path, expected_cost)
+            if cost != float("inf") and destination != router.start:
+                assert path[0] == router.start and path[-1] == destination
+                assert path_cost(graph, path) == cost  # ties can pick another path, but it has to be a real one this cheap
+
+
+def test_incremental_repair_matches_full_recompute():
+    for seed in range(200):
+        rng = random.Random(seed)
+        graph = Graph()
+        for _ in range(12):
+            node_one, node_two = rng.sample(NAMES, 2)
+            graph.add_edge(node_one, node_two, rng.randint(1, 10))
+        routers = [Router(start, graph, RouteCache(maxsize=8)) for start in "abc"]  # a small cache so evictions happen too
+        check(graph, routers)
+
+        for _ in range(40):
+            action = rng.random()
+            node_one, node_two = rng.sample(NAMES, 2)
+            if action < 0.35:  # new link or a weight change either way, also brings back removed nodes
+                graph.add_edge(node_one, node_two, rng.randint(1, 10))
+            elif action < 0.6:
+                graph.remove_edge(node_one, node_two)
+            elif action < 0.75:  # routers' own nodes included, they come back through add_edge
+                graph.remove_node(rng.choice("abc" + NAMES))
+            else:  # lookups between changes so cached entries have to be moved on or dropped
+                router = rng.choice(routers)
+                router.lookup(rng.choice(NAMES))
+                continue
+            check(graph, routers)
+
+
+def test_removed_router_comes_back():
+    graph = Graph()
+    graph.add_edge("a", "b", 1)
+    graph.add_edge("b", "c", 1)
+    router = Router("a", graph)
+    assert router.lookup("c") == (["a", "b", "c"], 2)
+    graph.remove_node("a")
+    assert router.lookup("c") == (["Path", "Removed"], float("inf"))
+    graph.add_edge("a", "b", 1)
+    assert router.lookup("c") == (["a", "b", "c"], 2)
+
+
+def test_shared_cache_keeps_lru_order_across_changes():
+    graph = Graph()
+    for node_one, node_two in (("a", "b"), ("a", "c"), ("a", "d"), ("x", "y")):
+        graph.add_edge(node_one, node_two, 1)
+    cache = RouteCache(maxsize=3)
+    router, other = Router("a", graph, cache), Router("x", graph, cache)
+    router.lookup("b")
+    router.lookup("c")
+    other.lookup("y")  # the most recently used entry
+    graph.add_edge("p", "q", 1)  # touches neither router's routes
+    assert list(cache.entries) == [("a", "b"), ("a", "c"), ("x", "y")]
+    router.lookup("d")  # evicts the least recently used, a -> b
+    assert list(cache.entries) == [("a", "c"), ("x", "y"), ("a", "d")]
+    hits = cache.hits
+    assert other.lookup("y") == (["x", "y"], 1) and cache.hits == hits + 1  # still served from the cache
+
+    graph.add_edge("a", "c", 5)  # a -> c got dearer, only that entry goes
+    assert list(cache.entries) == [("a", "d"), ("x", "y")]
+    assert router.lookup("c") == (["a", "c"], 5)
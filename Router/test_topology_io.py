@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from all_routers import routing_tables
+from csr_graph import CSRGraph
+from router import Graph, Router
+from topology_io import Snapshot, load_edge_list, save_binary_edges, save_snapshot
+
+
+def same_arrays(graph, other):
+    assert [str(name) for name in graph.names] == [str(name) for name in other.names]
+    assert list(graph.offsets) == list(other.offsets)
+    assert list(graph.targets) == list(other.targets)
+    assert list(graph.weights) == list(other.weights)
+
+
+def random_graph(rng, names, edges):
+    graph = Graph()
+    for _ in range(edges):
+        node_one, node_two = rng.sample(names, 2)
+        graph.add_edge(node_one, node_two, rng.randint(1, 10))
+    return graph
+
+
+def test_text_and_binary_edge_lists_load_the_same(tmp_path):
+    rng = random.Random(0)
+    for names in ("abcdefghij", [str(node_id) for node_id in range(10)]):  # named routers, and ids that need no names section
+        rows = ["{},{},{}".format(*rng.sample(names, 2), rng.uniform(0, 10)) for _ in range(40)]
+        text = tmp_path / "edges.csv"
+        text.write_text("from,to,weight\n# a comment\n\n" + "\n".join(rows) + "\n")
+        binary = tmp_path / "edges.bin"
+        save_binary_edges(str(binary), load_edge_list(str(text)))
+        same_arrays(load_edge_list(str(text)), load_edge_list(str(binary)))
+
+
+def test_snapshot_routes_match_router(tmp_path):
+    for seed in range(5):
+        rng = random.Random(seed)
+        graph = random_graph(rng, "abcdefgh", 14)
+        path = tmp_path / "graph.snap"
+        sources = rng.sample(sorted(graph.nodes), 3)  # the other starts fall back to a search over the mapped arrays
+        save_snapshot(str(path), graph, routing_tables(graph, sources=sources, processes=2))
+        with Snapshot(str(path)) as snapshot:
+            assert sorted(snapshot.graph.ids[source] for source in sources) == sorted(snapshot.tables)
+            for start in graph.nodes:
+                router = Router(start, graph)
+                for destination in graph.nodes:
+                    route, cost = snapshot.route(start, destination)
+                    assert cost == router.lookup(destination)[1], (seed, start, destination)
+                    if cost != float("inf"):
+                        assert route[0] == start and route[-1] == destination
+
+
+def test_graph_without_edges(tmp_path):
+    for nodes in ((), ("a", "b")):
+        graph = CSRGraph.from_edges([], nodes=nodes)
+        binary = tmp_path / "edges.bin"
+        save_binary_edges(str(binary), graph)
+        same_arrays(graph, load_edge_list(str(binary)))
+
+        path = tmp_path / "graph.snap"
+        save_snapshot(str(path), graph, ((name, [0.0 if other == name else float("inf") for other in nodes], [-1] * len(nodes)) for name in nodes))
+        with Snapshot(str(path)) as snapshot:
+            same_arrays(graph, snapshot.graph)
+            for start in nodes:
+                assert snapshot.route(start, start) == ([start], 0.0)
+                assert snapshot.route(start, "b" if start == "a" else "a") == (["Path", "Removed"], float("inf"))
+
+
+def test_short_rows_are_reported(tmp_path):
+    text = tmp_path / "edges.csv"
+    text.write_text("from,to,weight\na,b,1\nb,c\n")
+    with pytest.raises(ValueError, match="line 3"):
+        load_edge_list(str(text))
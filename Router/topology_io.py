@@ -0,0 +1,231 @@
+import argparse
+import csv
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from all_routers import routing_tables
+from csr_graph import CSRGraph
+
+MAGIC = b"RTSNAP01"
+HEADER = struct.Struct("<8sQQQQ")  # magic, node count, edge count, names size, table count
+BYTE_ORDER = {"little": 0, "big": 1}
+EDGE_MAGIC = b"RTEDGE01"
+EDGE_HEADER = struct.Struct("<8sQQQ")  # magic, node count, edge count, names size
+
+
+def _padded(size):
+    return (size + 7) // 8 * 8  # keep every section on an 8 byte boundary
+
+
+def read_edges(path, delimiter=None):
+    # stream (node_one, node_two, weight) rows out of a csv/tsv/whitespace edge list,
+    # the delimiter comes from the extension unless given, a header row is skipped
+    if delimiter is None:
+        delimiter = {".csv": ",", ".tsv": "\t"}.get(os.path.splitext(path)[1].lower())
+    with open(path, newline="") as f:
+        rows = csv.reader(f, delimiter=delimiter) if delimiter else (line.split() for line in f)
+        for line_number, row in enumerate(rows, 1):
+            if not row or row[0].startswith("#"):
+                continue
+            if len(row) < 3:
+                raise ValueError("{} line {}: expected node, node, weight but got {!r}".format(path, line_number, row))
+            try:
+                weight = float(row[2])
+            except ValueError:  # header row like "from,to,weight"
+                continue
+            yield row[0], row[1], weight
+
+
+def load_edge_list(path, delimiter=None):
+    # binary edge lists (see save_binary_edges) are mapped and built without a python loop over the edges
+    with open(path, "rb") as f:
+        if f.read(len(EDGE_MAGIC)) == EDGE_MAGIC:
+            return load_binary_edges(path)
+    return CSRGraph.from_edges(read_edges(path, delimiter))
+
+
+def save_binary_edges(path, graph):
+    # integer id edge list: header, names joined by newlines (left empty, ids are the names), then the
+    # int32 sources, int32 targets and float64 weights as little endian columns, each padded to 8 bytes,
+    # any tool that can write three columns of numbers can produce one
+    import numpy as np
+    if not isinstance(graph, CSRGraph):
+        graph = CSRGraph.from_graph(graph)
+    names = [str(name) for name in graph.names]
+    if any("\n" in name for name in names):
+        raise ValueError("router names can't contain newlines")
+    names_bytes = b"" if names == [str(node_id) for node_id in range(len(names))] else "\n".join(names).encode()
+    offsets = np.frombuffer(graph.offsets, dtype=np.int64) if graph.offsets else np.zeros(1, np.int64)
+    sources = np.repeat(np.arange(len(names), dtype="<i4"), np.diff(offsets))
+    with open(path, "wb") as f:
+        f.write(EDGE_HEADER.pack(EDGE_MAGIC, len(names), graph.edge_count(), len(names_bytes)))
+        for data in (names_bytes, sources.tobytes(), np.asarray(graph.targets, dtype="<i4").tobytes(), np.asarray(graph.weights, dtype="<f8").tobytes()):
+            f.write(data + b"\0" * (_padded(len(data)) - len(data)))
+
+
+def load_binary_edges(path):
+    # map the columns with numpy and build the CSR arrays with a stable argsort by source,
+    # so loading costs a few array passes in C instead of parsing and interning every edge
+    import numpy as np
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    magic, node_count, edge_count, names_size = EDGE_HEADER.unpack_from(data, 0)
+    if magic != EDGE_MAGIC:
+        raise ValueError("{} is not a binary edge list".format(path))
+    position = EDGE_HEADER.size
+    names = bytes(data[position:position + names_size]).decode().split("\n") if names_size else [str(node_id) for node_id in range(node_count)]
+    if len(names) != node_count:
+        raise ValueError("{} has {} names for {} nodes".format(path, len(names), node_count))
+    position += _padded(names_size)
+    sources = np.frombuffer(data, dtype="<i4", count=edge_count, offset=position)
+    position += _padded(edge_count * 4)
+    targets = np.frombuffer(data, dtype="<i4", count=edge_count, offset=position)
+    position += _padded(edge_count * 4)
+    weights = np.frombuffer(data, dtype="<f8", count=edge_count, offset=position)
+    if edge_count and (min(sources.min(), targets.min()) < 0 or max(sources.max(), targets.max()) >= node_count):
+        raise ValueError("{} has edges to node ids outside 0..{}".format(path, node_count - 1))
+
+    order = np.argsort(sources, kind="stable")  # same order as CSRGraph.from_edges' counting sort
+    offsets = np.zeros(node_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=node_count), out=offsets[1:])
+
+    def packed(typecode, values, dtype):  # numpy array to array.array in one copy, Dijkstra indexes array.array faster
+        result = array(typecode)
+        result.frombytes(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        return result
+    return CSRGraph(names, packed("q", offsets, np.int64), packed("i", targets[order], np.intc), packed("d", weights[order], np.float64))
+
+
+def save_snapshot(path, graph, tables=()):
+    # write the graph's CSR arrays and any (source, distances, parents) routing tables,
+    # like the ones all_routers.routing_tables() yields, to one file that load_snapshot() can map
+    if not isinstance(graph, CSRGraph):
+        graph = CSRGraph.from_graph(graph)
+    names = [str(name) for name in graph.names]
+    if any("\n" in name for name in names):
+        raise ValueError("router names can't contain newlines")
+    names_bytes = "\n".join(names).encode()
+    node_count, edge_count = len(names), graph.edge_count()
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, node_count, edge_count, len(names_bytes), 0))
+        f.write(struct.pack("<Q", BYTE_ORDER[sys.byteorder]))
+        for data in (names_bytes, array("q", graph.offsets).tobytes(), array("i", graph.targets).tobytes(), array("d", graph.weights).tobytes()):
+            f.write(data + b"\0" * (_padded(len(data)) - len(data)))
+
+        table_count = 0
+        for source, distances, parents in tables:  # written as they arrive so tables never all sit in memory
+            parents = array("i", parents).tobytes()
+            f.write(struct.pack("<q", graph.ids[source]))
+            f.write(array("d", distances).tobytes())
+            f.write(parents + b"\0" * (_padded(len(parents)) - len(parents)))
+            table_count += 1
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, node_count, edge_count, len(names_bytes), table_count))
+
+
+class Snapshot:
+    # a graph and its routing tables mapped straight from a snapshot file, nothing is parsed or
+    # copied apart from the names, so a restarted process can answer routes straight away
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, node_count, edge_count, names_size, table_count = HEADER.unpack_from(self.map, 0)
+        byte_order, = struct.unpack_from("<Q", self.map, HEADER.size)
+        if magic != MAGIC:
+            raise ValueError("{} is not a router snapshot".format(path))
+        if byte_order != BYTE_ORDER[sys.byteorder]:
+            raise ValueError("{} was written on a machine with a different byte order".format(path))
+
+        view = self.view = memoryview(self.map)
+        position = HEADER.size + 8
+
+        def section(size, typecode):
+            nonlocal position
+            data = view[position:position + size].cast(typecode)
+            position += _padded(size)
+            return data
+
+        names = bytes(view[position:position + names_size]).decode().split("\n") if node_count else []
+        position += _padded(names_size)
+        offsets = section((node_count + 1) * 8, "q")
+        targets = section(edge_count * 4, "i")
+        weights = section(edge_count * 8, "d")
+        self.graph = CSRGraph(names, offsets, targets, weights)
+
+        self.tables = {}  # source id -> (distances, parents)
+        for _ in range(table_count):
+            source = section(8, "q")[0]
+            self.tables[source] = (section(node_count * 8, "d"), section(node_count * 4, "i"))
+
+    def route(self, start, destination):
+        # path and cost from a stored table, or a fresh search if start has no table
+        graph = self.graph
+        start_id, destination_id = graph.ids[start], graph.ids[destination]
+        distances, parents = self.tables.get(start_id) or graph.dijkstra(start_id)
+        if destination_id != start_id and parents[destination_id] == -1:
+            return ["Path", "Removed"], float("inf")
+        path = [destination_id]
+        while path[-1] != start_id:
+            path.append(parents[path[-1]])
+        return [graph.names[node_id] for node_id in reversed(path)], distances[destination_id]
+
+    def close(self):
+        # the views have to go before the map can be closed
+        graph = self.graph
+        for values in (graph.offsets, graph.targets, graph.weights):
+            values.release()
+        for distances, parents in self.tables.values():
+            distances.release()
+            parents.release()
+        self.tables = {}
+        self.view.release()
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def load_snapshot(path):
+    return Snapshot(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build router snapshots from edge lists and answer routes from them")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="load an edge list (.csv, .tsv, whitespace separated or binary) into a snapshot")
+    build.add_argument("edges")
+    build.add_argument("snapshot")
+    build.add_argument("--tables", action="store_true", help="also compute and store every router's routing table")
+    build.add_argument("-j", "--processes", type=int, default=None, help="worker processes for --tables")
+    convert = commands.add_parser("convert", help="turn a text edge list into a binary one that loads without parsing")
+    convert.add_argument("edges")
+    convert.add_argument("binary")
+    route = commands.add_parser("route", help="print the path between two routers from a snapshot")
+    route.add_argument("snapshot")
+    route.add_argument("start")
+    route.add_argument("end")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        graph = load_edge_list(args.edges)
+        tables = ()
+        if args.tables:
+            tables = routing_tables(graph, processes=args.processes)
+        save_snapshot(args.snapshot, graph, tables)
+    elif args.command == "convert":
+        save_binary_edges(args.binary, load_edge_list(args.edges))
+    else:
+        with load_snapshot(args.snapshot) as snapshot:
+            path, cost = snapshot.route(args.start, args.end)
+            print("Start: {}\nEnd: {}\nPath: {}\nCost: {}".format(args.start, args.end, " -> ".join(path), cost))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import argparse, asyncio, random, selectors, time
+
+from simulation import distribution, percentile
+
+class VirtualSelector(selectors.DefaultSelector):	# instead of blocking until the next timer is due, jump the clock straight to it.
+	def __init__(self):
+		super().__init__()
+		self.loop = None
+
+	def select(self, timeout=None):
+		events = super().select(0)					# anything really ready (the loop's own wakeup pipe) still gets through.
+		if events or timeout == 0:
+			return events
+		if timeout is None:							# nothing scheduled and nothing to wait on, the coroutines are stuck.
+			raise RuntimeError("every task is waiting and no timer is pending, the simulation deadlocked")
+		self.loop.virtual_time += timeout
+		return events
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):	# event loop whose time() only moves when every task is asleep, asyncio.sleep() costs no real time.
+	def __init__(self):
+		selector = VirtualSelector()
+		super().__init__(selector)
+		selector.loop = self
+		self.virtual_time = 0.0
+
+	def time(self):
+		return self.virtual_time
+
+async def barber(name, chairs, service_time, rng, stats, verbose):
+	loop = asyncio.get_running_loop()
+	while True:
+		customer = await chairs.get()				# sleeps here until a customer sits down.
+		if customer is None:						# sentinel, the shop is closing.
+			break
+		number, arrived = customer
+		started = loop.time()
+		stats["waits"].append(started - arrived)
+		if verbose:
+			print("> Customer {} goes to Barber {}".format(number, name))
+		cut = service_time(rng)
+		stats["busy"] += cut
+		await asyncio.sleep(cut)					# haircut.
+		if verbose:
+			print("\nBarber {}: Finished with Customer {}, next!\n".format(name, number))
+			if chairs.empty():
+				print("No more customers")
+				print("Barber {} is sleeping\U0001F634\U0001F634\U0001F634\n".format(name))
+
+async def shop(barbers, chairs, customers, next_arrival, service_time, rng, verbose):
+	loop = asyncio.get_running_loop()
+	waiting_room = asyncio.Queue(maxsize=chairs)
+	stats = {"waits": [], "busy": 0.0, "balked": 0, "queue": []}	# queue is (time, customers sitting) at every arrival.
+	begin = loop.time()
+	workers = [asyncio.ensure_future(barber(name, waiting_room, service_time, rng, stats, verbose)) for name in range(1, barbers + 1)]
+	for number in range(1, customers + 1):
+		await asyncio.sleep(next_arrival(rng))		# time until the next customer walks in.
+		stats["queue"].append((loop.time() - begin, waiting_room.qsize()))
+		try:
+			waiting_room.put_nowait((number, loop.time()))
+			if verbose:
+				print(">>> Customer {} walks into shop".format(number))
+		except asyncio.QueueFull:
+			stats["balked"] += 1
+			if verbose:
+				print("No more chairs, customer {} will come back later".format(number))
+	for _ in workers:								# one sentinel per barber, behind the last customer.
+		await waiting_room.put(None)
+	await asyncio.gather(*workers)
+	stats["duration"] = loop.time() - begin
+	return stats
+
+def run(barbers=3, chairs=15, customers=30, arrival="randrange:2,7", service="randrange:3,8", seed=None, realtime=False, verbose=False):
+	# the barbershop as coroutines, simulated on a virtual clock unless realtime is set, the same seed always gives the same run
+	if chairs < 1:
+		raise ValueError("asyncio.Queue(maxsize=0) has no limit, the shop needs at least one chair")
+	rng = random.Random(seed)
+	loop = asyncio.new_event_loop() if realtime else VirtualClockLoop()
+	try:
+		stats = loop.run_until_complete(shop(barbers, chairs, customers, distribution(arrival), distribution(service), rng, verbose))
+	finally:
+		loop.close()
+
+	waits, balked, duration = stats["waits"], stats["balked"], stats["duration"]
+	served = len(waits)
+	ordered = sorted(waits)
+	return {
+		"customers": served + balked,
+		"served": served,
+		"balked": balked,
+		"balk_rate": balked / (served + balked) if served + balked else 0.0,
+		"duration": duration,
+		"throughput": served / duration if duration else 0.0,
+		"utilization": stats["busy"] / (barbers * duration) if duration else 0.0,
+		"mean_wait": sum(waits) / served if served else 0.0,
+		"p50_wait": percentile(ordered, 0.50),
+		"p90_wait": percentile(ordered, 0.90),
+		"p99_wait": percentile(ordered, 0.99),
+		"max_wait": ordered[-1] if ordered else 0.0,
+		"max_queue": max((length for _, length in stats["queue"]), default=0),
+		"queue_samples": stats["queue"],
+	}
+
+def main():
+	parser = argparse.ArgumentParser(description="The sleeping barber shop with asyncio, on a virtual clock unless --realtime")
+	parser.add_argument("--barbers", type=int, default=3)
+	parser.add_argument("--chairs", type=int, default=15)
+	parser.add_argument("--customers", type=int, default=30)
+	parser.add_argument("--arrival", default="randrange:2,7", help="time between customers, see simulation.py")
+	parser.add_argument("--service", default="randrange:3,8", help="haircut time, see simulation.py")
+	parser.add_argument("--seed", type=int, default=None)
+	parser.add_argument("--realtime", action="store_true", help="really sleep, like the threaded version")
+	parser.add_argument("-v", "--verbose", action="store_true", help="print what every customer and barber does")
+	args = parser.parse_args()
+
+	begin = time.perf_counter()
+	report = run(args.barbers, args.chairs, args.customers, args.arrival, args.service, args.seed, args.realtime, args.verbose)
+	elapsed = time.perf_counter() - begin
+	print("{customers} customers, {served} served, {balked} balked ({balk_rate:.2%}) in {duration:.1f}s of shop time".format(**report))
+	print("throughput {throughput:.4f} per second, barbers busy {utilization:.2%} of the time".format(**report))
+	print("wait mean {mean_wait:.2f} p50 {p50_wait:.2f} p90 {p90_wait:.2f} p99 {p99_wait:.2f} max {max_wait:.2f}, waiting room max {max_queue}".format(**report))
+	print("ran in {:.3f}s".format(elapsed))
+
+if __name__ == '__main__':
+	main()
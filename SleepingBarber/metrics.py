@@ -0,0 +1,89 @@
+import json, queue, threading, time
+from types import SimpleNamespace
+
+from simulation import percentile
+try:
+	import profiling
+except ImportError:							# not run through profiling.py, the queue counts are skipped.
+	profiling = SimpleNamespace(count=lambda name, amount=1: None, timer=lambda name: lambda function: function)
+
+class Metrics:										# timings and counters collected from many threads at once.
+	def __init__(self):
+		self.samples = {}							# name -> list of seconds, list.append is atomic so no lock is needed.
+		self.counters = {}							# counts, and gauges like utilization that are just set.
+		self.counter_lock = threading.Lock()
+
+	def record(self, name, seconds):
+		self.samples.setdefault(name, []).append(seconds)
+
+	def count(self, name, amount=1):
+		with self.counter_lock:						# += isn't atomic, unlike append.
+			self.counters[name] = self.counters.get(name, 0) + amount
+
+	def set(self, name, value):
+		self.counters[name] = value
+
+	def summary(self):								# name -> count, total, mean and percentiles, plus the counters.
+		report = {}
+		for name, values in sorted(self.samples.items()):
+			ordered = sorted(values)
+			report[name] = {
+				"count": len(ordered),
+				"total": sum(ordered),
+				"mean": sum(ordered) / len(ordered),
+				"p50": percentile(ordered, 0.50),
+				"p95": percentile(ordered, 0.95),
+				"p99": percentile(ordered, 0.99),
+				"max": ordered[-1],
+			}
+		report.update(sorted(self.counters.items()))
+		return report
+
+	def export(self, path):							# write the summary as json for dashboards or later comparison.
+		with open(path, "w") as f:
+			json.dump(self.summary(), f, indent=2)
+
+class InstrumentedLock:								# a Lock that records how long threads waited for it and how long they held it.
+	def __init__(self, metrics, name):
+		self.lock = threading.Lock()
+		self.metrics = metrics
+		self.name = name
+		self.acquired_at = 0.0						# only the holder ever touches this.
+
+	def acquire(self, blocking=True, timeout=-1):
+		start = time.perf_counter()
+		acquired = self.lock.acquire(blocking, timeout)
+		if acquired:
+			self.acquired_at = time.perf_counter()
+			self.metrics.record(self.name + ".lock_wait", self.acquired_at - start)
+		return acquired
+
+	def release(self):
+		held = time.perf_counter() - self.acquired_at
+		self.lock.release()
+		self.metrics.record(self.name + ".lock_hold", held)
+
+	def locked(self):
+		return self.lock.locked()
+
+	__enter__ = acquire
+
+	def __exit__(self, *exc_info):
+		self.release()
+
+class InstrumentedQueue(queue.Queue):				# queue.Queue whose internal mutex is an InstrumentedLock, so contention on put/get shows up in the metrics.
+	def __init__(self, maxsize, metrics, name="queue"):
+		super().__init__(maxsize)
+		self.name = name
+		self.mutex = InstrumentedLock(metrics, name)
+		self.not_empty = threading.Condition(self.mutex)	# the conditions have to share the new mutex.
+		self.not_full = threading.Condition(self.mutex)
+		self.all_tasks_done = threading.Condition(self.mutex)
+
+	def _put(self, item):							# called with the mutex held by put() and put_nowait(), the counts only go up when profiling.
+		profiling.count(self.name + ".puts")
+		super()._put(item)
+
+	def _get(self):
+		profiling.count(self.name + ".gets")
+		return super()._get()
@@ -0,0 +1,124 @@
+import argparse, heapq, random, time
+from array import array
+from bisect import bisect_right
+from collections import deque
+from types import SimpleNamespace
+
+try:
+	import profiling
+except ImportError:							# only there when profiling.py ran this, otherwise the hooks do nothing.
+	profiling = SimpleNamespace(count=lambda name, amount=1: None, timer=lambda name: lambda function: function)
+
+def distribution(spec):								# turns "kind:args" into a function drawing one value from a random.Random.
+	kind, _, args = spec.partition(":")
+	values = [float(value) for value in args.split(",")] if args else []
+	if kind == "const":								# const:5, always the same.
+		return lambda rng: values[0]
+	if kind == "exp":								# exp:2, exponential with mean 2 (a Poisson process for arrivals).
+		return lambda rng: rng.expovariate(1 / values[0])
+	if kind == "uniform":							# uniform:3,8, any real number in between.
+		return lambda rng: rng.uniform(values[0], values[1])
+	if kind == "randrange":							# randrange:3,8, whole numbers like the threaded version, 8 excluded.
+		low, high = int(values[0]), int(values[1])
+		return lambda rng: rng.randrange(low, high)
+	if kind == "lognormal":							# lognormal:mu,sigma, long tailed service times.
+		return lambda rng: rng.lognormvariate(values[0], values[1])
+	if kind == "gamma":								# gamma:shape,scale.
+		return lambda rng: rng.gammavariate(values[0], values[1])
+	raise ValueError("unknown distribution {!r}, use const, exp, uniform, randrange, lognormal or gamma".format(spec))
+
+def percentile(ordered, fraction):					# nearest rank percentile of an already sorted sequence.
+	if not ordered:
+		return 0.0
+	return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+@profiling.timer("simulation.simulate")
+def simulate(barbers=3, chairs=15, customers=30, arrival="exp:2", service="randrange:3,8", seed=None, samples=20, until=None):
+	# discrete event run of the barbershop, customers arrive one after another (arrival is the gap between two of them),
+	# sit down if a chair is free and balk otherwise, and the barbers take them first come first served.
+	# the barbers are a fixed pool kept as a heap of the times they're next free, so a customer costs O(log barbers) and
+	# nothing sleeps, until stops new customers arriving after that simulated time (the ones inside still get served).
+	rng = random.Random(seed)
+	next_arrival, service_time = distribution(arrival), distribution(service)
+	free_at = [0.0] * barbers						# when each barber finishes his current customer.
+	waiting = deque()								# start times of the customers sitting in the waiting room, in order.
+	arrivals, starts = array("d"), array("d")		# per served customer, both only ever grow since it's first come first served.
+	waits = array("d")
+	busy = 0.0										# total time spent cutting hair, for utilization.
+	balked = 0
+	max_queue = 0
+	now = 0.0
+	finished = 0.0
+	for _ in range(customers):
+		now += next_arrival(rng)
+		if until is not None and now > until:
+			break
+		while waiting and waiting[0] <= now:		# whoever got a barber by now has left the waiting room.
+			waiting.popleft()
+		if len(waiting) >= chairs and free_at[0] > now:	# no chair and no barber free, the customer walks away.
+			balked += 1
+			continue
+		start = max(now, heapq.heappop(free_at))	# first come first served, he gets the barber that's free first.
+		cut = service_time(rng)
+		heapq.heappush(free_at, start + cut)
+		finished = max(finished, start + cut)
+		busy += cut
+		if start > now:
+			waiting.append(start)
+			max_queue = max(max_queue, len(waiting))
+		arrivals.append(now)
+		starts.append(start)
+		waits.append(start - now)
+
+	served = len(waits)
+	profiling.count("simulation.barber_pops", served)	# one pop off the barbers' heap per customer served.
+	profiling.count("simulation.balked", balked)
+	duration = max(finished, now)
+	ordered = sorted(waits)
+	queue_samples = []								# (time, customers in the waiting room) at evenly spaced times.
+	for sample in range(samples + 1 if samples else 0):
+		moment = duration * sample / samples
+		queue_samples.append((moment, bisect_right(arrivals, moment) - bisect_right(starts, moment)))
+	return {
+		"customers": served + balked,
+		"served": served,
+		"balked": balked,
+		"balk_rate": balked / (served + balked) if served + balked else 0.0,
+		"duration": duration,
+		"throughput": served / duration if duration else 0.0,	# customers served per unit of simulated time.
+		"utilization": busy / (barbers * duration) if duration else 0.0,
+		"mean_wait": sum(waits) / served if served else 0.0,
+		"p50_wait": percentile(ordered, 0.50),
+		"p90_wait": percentile(ordered, 0.90),
+		"p99_wait": percentile(ordered, 0.99),
+		"max_wait": ordered[-1] if ordered else 0.0,
+		"mean_queue": sum(waits) / duration if duration else 0.0,	# time average of the waiting room (Little's law).
+		"max_queue": max_queue,
+		"queue_samples": queue_samples,
+	}
+
+def main():
+	parser = argparse.ArgumentParser(description="Simulate the sleeping barber shop without threads or sleeping")
+	parser.add_argument("--barbers", type=int, default=3)
+	parser.add_argument("--chairs", type=int, default=15)
+	parser.add_argument("--customers", type=int, default=1000000)
+	parser.add_argument("--arrival", default="exp:2", help="time between customers, e.g. exp:2, uniform:1,3, const:2")
+	parser.add_argument("--service", default="randrange:3,8", help="haircut time, e.g. randrange:3,8, lognormal:1.5,0.4")
+	parser.add_argument("--until", type=float, default=None, help="stop letting customers in after this simulated time")
+	parser.add_argument("--samples", type=int, default=10, help="points in the queue length over time")
+	parser.add_argument("--seed", type=int, default=None)
+	args = parser.parse_args()
+
+	begin = time.perf_counter()
+	report = simulate(args.barbers, args.chairs, args.customers, args.arrival, args.service, args.seed, args.samples, args.until)
+	elapsed = time.perf_counter() - begin
+	print("{customers} customers, {served} served, {balked} balked ({balk_rate:.2%}) in {duration:.1f} time units".format(**report))
+	print("throughput {throughput:.4f} per time unit, barbers busy {utilization:.2%} of the time".format(**report))
+	print("wait mean {mean_wait:.2f} p50 {p50_wait:.2f} p90 {p90_wait:.2f} p99 {p99_wait:.2f} max {max_wait:.2f}".format(**report))
+	print("waiting room mean {mean_queue:.2f} max {max_queue}".format(**report))
+	for moment, length in report["queue_samples"]:
+		print("  t={:<12.1f} {:>4} {}".format(moment, length, "#" * length))
+	print("simulated in {:.3f}s".format(elapsed))
+
+if __name__ == '__main__':
+	main()
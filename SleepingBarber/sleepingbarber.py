@@ -1,47 +1,71 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
-import time, queue, random
-from threading import Thread,Lock
+import argparse, time, queue, random
+from threading import Thread
+
+from metrics import Metrics, InstrumentedQueue
 
 class Barber(Thread):								# thread class invokes the run() method in a separate thread of control.	
-	def __init__(self, barber, chairs):				# barbers(one-by-one) and number of chairs.
+	def __init__(self, barber, chairs, metrics=None, scale=1):	# barbers(one-by-one) and number of chairs.
 		Thread.__init__(self)						# Because the *args and **kwargs values passed to the Thread constructor are saved in private variables, they are not easily accessed from a subclass. To pass arguments to a custom thread type, we need to redefine the constructor to save the values in an instance attribute that can be seen in the subclass.
 		self.barber = barber
 		self.chairs = chairs						# queue of people with the max size of how many chairs there are.
 		self.asleep = True  						# barber is sleeping.
+		self.customer = None						# who is in this barber's chair, every barber has his own.
+		self.served = 0
+		self.busy = 0.0								# seconds spent cutting hair.
+		self.metrics = metrics if metrics is not None else Metrics()
+		self.scale = scale							# multiplies every sleep, 0 runs as fast as the threads can go.
 
 	def run(self):									# in this section, we will create a subclass of Thread and override run() for customers to go to the barber and get their haircut.
+		started = time.perf_counter()
 		while True: 								# if customer in waiting room.
 			self.asleep = False						# barber wakes up.	
-			customer = self.chairs.get()			# dequeueing customer because customer is going for haircut so he is not sitting on a chair anymore.
+			item = self.chairs.get()				# dequeueing customer because customer is going for haircut so he is not sitting on a chair anymore.
+			if item is None:						# sentinel from main(), the shop is closing.
+				break
+			customer, seated = item
+			cut_start = time.perf_counter()
+			self.metrics.record("time_in_queue", cut_start - seated)
+			self.customer = customer				# customer is in this barber's chair.
 			print("> Customer {} goes to Barber {}".format(customer, self.barber))
-			Customer.chair = True  					# customer is in barber chair.
-			time.sleep(random.randrange(3,8))		# random haircutting time.
+			time.sleep(random.randrange(3,8) * self.scale)	# random haircutting time.
 			print("\nBarber {}: Finished with Customer {}, next!\n".format(self.barber,customer))
+			self.busy += time.perf_counter() - cut_start
+			self.served += 1
+			self.customer = None
 			if self.chairs.empty():					# if the queue is empty.
 				print("No more customers")
 				print("Barber {} is sleeping\U0001F634\U0001F634\U0001F634\n".format(self.barber)) # printing string with unicode for emoji's.
+		lifetime = time.perf_counter() - started
+		self.metrics.set("barber_{}.utilization".format(self.barber), round(self.busy / lifetime, 4) if lifetime else 0.0)
+		self.metrics.count("barber_{}.served".format(self.barber), self.served)
 
 class Customer(Thread):								# thread class invokes the run() method in a separate thread of control.
 
-	def __init__(self, customer, chairs):			# customers(one-by-one) and the number of chairs.
+	def __init__(self, customer, chairs, metrics=None, scale=1):	# customers(one-by-one) and the number of chairs.
 		Thread.__init__(self)						# Because the *args and **kwargs values passed to the Thread constructor are saved in private variables, they are not easily accessed from a subclass. To pass arguments to a custom thread type, we need to redefine the constructor to save the values in an instance attribute that can be seen in the subclass.
 		self.customer = customer
 		self.chairs = chairs 						# queue of people with the max size of how many chairs there are.
 		self.busy = False  							# is barber busy?
-		self.lock = Lock()							# used to prevent race condition.
+		self.metrics = metrics if metrics is not None else Metrics()
+		self.scale = scale
 
 	def wait(self):
-		time.sleep(random.randrange(3,6))			# random wait time 3-6secs.
+		time.sleep(random.randrange(3,6) * self.scale)	# random wait time 3-6secs.
 
 	def run(self):									# in this section, we will create a subclass of Thread and override run() for customers to be enqueued if the queue is not full.
-		with self.lock:								# using lock to handle data race(race condition).
-			if not self.chairs.full():  			# if waiting room isn't full
-				time.sleep(random.randrange(2,7))	# random time for customers to walk in 2-7secs.
-				self.chairs.put(self.customer) 		# add customer into waiting room.
-				print(">>> Customer {} walks into shop" .format(self.customer))
-			else:
-				print ("No more chairs, customer {} will come back later".format(self.customer))
+		time.sleep(random.randrange(2,7) * self.scale)	# random time for customers to walk in 2-7secs, nothing is held while walking.
+		arrived = time.perf_counter()
+		try:										# checking full() and then calling put() races with every other customer, put_nowait() does both in one step under the queue's own lock.
+			self.chairs.put_nowait((self.customer, time.perf_counter()))	# add customer into waiting room.
+		except queue.Full:
+			self.metrics.count("balked")
+			print ("No more chairs, customer {} will come back later".format(self.customer))
+		else:
+			self.metrics.record("time_to_seat", time.perf_counter() - arrived)
+			self.metrics.count("seated")
+			print(">>> Customer {} walks into shop" .format(self.customer))
 
 def listof(num):									# function to turn a number into a list counting up to a given number.
 	a = []											# initializing list.
@@ -50,21 +74,30 @@ def listof(num):									# function to turn a number into a list counting up to
 	return a										# return the list.
 
 def main():
-	barbers = listof(3)								# 3 barbers.
-	customers = listof(30)							# 30 customers will be coming in.
-	chairs = queue.Queue(15)						# queue with max size of 15 which are the chairs.
+	parser = argparse.ArgumentParser(description="The sleeping barber problem with one thread per barber and per customer")
+	parser.add_argument("--barbers", type=int, default=3)
+	parser.add_argument("--customers", type=int, default=30)
+	parser.add_argument("--chairs", type=int, default=15)
+	parser.add_argument("--scale", type=float, default=1, help="multiplies every sleep, 0 hammers the waiting room as fast as possible")
+	parser.add_argument("--metrics", default=None, help="write the timing metrics to this json file")
+	args = parser.parse_args()
+
+	metrics = Metrics()
+	barbers = listof(args.barbers)					# 3 barbers.
+	customers = listof(args.customers)				# 30 customers will be coming in.
+	chairs = InstrumentedQueue(args.chairs, metrics, "waiting_room")	# queue with max size of 15 which are the chairs, its lock reports wait and hold times.
 	customer_threads = []							# initializing a list for customer threads.
 	barber_threads = []								# initializing a list for barber threads.
 
 #-----------------Creating Threads-----------------#
 
 	for customer in customers:						# for every customer in the list customers,
-		t1 = Customer(customer, chairs)				# creating t1 thread for every customer there is (in this case 20).
+		t1 = Customer(customer, chairs, metrics, args.scale)	# creating t1 thread for every customer there is (in this case 20).
 		customer_threads.append(t1)					# appending the threads to customer_threads list.
 		t1.setDaemon = True							# By setting them as daemon threads, we can let them run and forget about them, and when our program quits, any daemon threads are killed automatically.
 
 	for barber in barbers:							# for every barber in the list barbers.
-		t2 = Barber(barber, chairs)					# creating t2 thread for every barber there is (in this case 3).
+		t2 = Barber(barber, chairs, metrics, args.scale)	# creating t2 thread for every barber there is (in this case 3).
 		barber_threads.append(t2)					# appending the threads to barber_threads list.
 		t2.setDaemon = True							# By setting them as daemon threads, we can let them run and forget about them, and when our program quits, any daemon threads are killed automatically.
 
@@ -77,10 +110,22 @@ def main():
 
 #-----------------Joining Threads-----------------#
 
-	for thread in barber_threads:					# for every thread in barber_thread,
-		thread.join()								# join thread.
 	for thread in customer_threads:					# for every thread in customer_threads,
 		thread.join()								# join thread.
+	for thread in barber_threads:					# one sentinel per barber, queued behind the last customer so everyone still gets a haircut.
+		chairs.put(None)
+	for thread in barber_threads:					# for every thread in barber_thread,
+		thread.join()								# join thread.
+
+#-----------------Reporting Metrics----------------#
+
+	for name, value in metrics.summary().items():
+		if isinstance(value, dict):
+			print("{:<24} n={count:<8} mean={mean:.6f}s p50={p50:.6f}s p95={p95:.6f}s p99={p99:.6f}s max={max:.6f}s".format(name, **value))
+		else:
+			print("{:<24} {}".format(name, value))
+	if args.metrics:
+		metrics.export(args.metrics)
 
 if __name__ == '__main__':
 	main()
\ No newline at end of file
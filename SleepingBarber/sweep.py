@@ -0,0 +1,77 @@
+import argparse, csv, itertools, math, os, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from simulation import simulate
+
+METRICS = ["throughput", "utilization", "mean_wait", "p90_wait", "p99_wait", "balk_rate", "mean_queue"]
+T_95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228, 2.201, 2.179, 2.160, 2.145, 2.131,
+		2.120, 2.110, 2.101, 2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]	# student t, two sided 95%, by degrees of freedom.
+
+def parse_range(text, kind=int):						# "1-4" -> 1,2,3,4 and "1,2,8" -> 1,2,8, "0.1-0.5:0.1" steps by 0.1.
+	values = []
+	for part in text.split(","):
+		span, _, step = part.partition(":")
+		low, dash, high = span.partition("-")
+		if not dash:
+			values.append(kind(span))
+			continue
+		low, high, step = kind(low), kind(high), kind(step) if step else kind(1)
+		count = int(round((high - low) / step)) + 1
+		values.extend(kind(low + index * step) if kind is int else round(low + index * step, 10) for index in range(count))
+	return values
+
+def confidence(values):								# mean and the half width of its 95% confidence interval.
+	count = len(values)
+	mean = sum(values) / count
+	if count < 2:
+		return mean, float("nan")
+	variance = sum((value - mean) ** 2 for value in values) / (count - 1)
+	critical = T_95[count - 2] if count - 1 <= len(T_95) else 1.96
+	return mean, critical * math.sqrt(variance / count)
+
+def run_point(point, replications, customers, seed):
+	# every replication of one configuration, replication r uses the same seed at every point (common random numbers),
+	# so differences between configurations aren't drowned out by different random draws
+	barbers, chairs, rate, service = point
+	reports = [simulate(barbers, chairs, customers, "exp:{}".format(1 / rate), service, "{}-{}".format(seed, replication), samples=0)
+			   for replication in range(replications)]
+	row = {"barbers": barbers, "chairs": chairs, "arrival_rate": rate, "service": service, "replications": replications, "customers": customers}
+	for metric in METRICS:
+		row[metric], row[metric + "_ci"] = confidence([report[metric] for report in reports])
+	return row
+
+def sweep(barbers, chairs, rates, services, replications=10, customers=10000, seed=0, output="sweep.csv", processes=None):
+	# run every combination across a process pool, rows are written to the csv as soon as their point finishes
+	points = list(itertools.product(barbers, chairs, rates, services))
+	columns = ["barbers", "chairs", "arrival_rate", "service", "replications", "customers"] + [name for metric in METRICS for name in (metric, metric + "_ci")]
+	with open(output, "w", newline="") as f, ProcessPoolExecutor(max_workers=processes or os.cpu_count()) as pool:
+		writer = csv.DictWriter(f, columns)
+		writer.writeheader()
+		jobs = [pool.submit(run_point, point, replications, customers, seed) for point in points]
+		for done, job in enumerate(as_completed(jobs), 1):
+			writer.writerow(job.result())
+			f.flush()
+			yield done, len(points)
+
+def main():
+	parser = argparse.ArgumentParser(description="Sweep the barbershop simulation over a grid of configurations")
+	parser.add_argument("--barbers", default="1-5", help="e.g. 1-5, 2,4,8")
+	parser.add_argument("--chairs", default="0-20:5")
+	parser.add_argument("--rates", default="0.2-1.0:0.2", help="customers arriving per time unit (exponential gaps)")
+	parser.add_argument("--service", action="append", default=None, help="haircut time distributions, repeat for more, default randrange:3,8")
+	parser.add_argument("-r", "--replications", type=int, default=10)
+	parser.add_argument("-n", "--customers", type=int, default=10000, help="customers per replication")
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("-o", "--output", default="sweep.csv")
+	parser.add_argument("-j", "--processes", type=int, default=None)
+	args = parser.parse_args()
+
+	begin = time.perf_counter()
+	progress = sweep(parse_range(args.barbers), parse_range(args.chairs), parse_range(args.rates, float), args.service or ["randrange:3,8"],
+					 args.replications, args.customers, args.seed, args.output, args.processes)
+	for done, total in progress:
+		print("\r{}/{} configurations".format(done, total), end="", flush=True)
+	print("\nwrote {} in {:.1f}s".format(args.output, time.perf_counter() - begin))
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,203 @@
+"""Opt-in counters and timers for the projects in this repo, and a runner that profiles any of their scripts.
+
+The tools call count()/timer() around their hot loops, which do nothing until enable() is called. They only find
+this module when the runner below started them (it registers itself in sys.modules), run any other way they fall
+back to no-op stand-ins and don't touch sys.path. To profile a script without editing it:
+
+    python profiling.py [--profile cprofile|sample] [-o PREFIX] Router/router.py [its args...]
+
+which runs the script as __main__ with the counters on and writes PREFIX.prof (cProfile, open with pstats or
+snakeviz) or PREFIX.samples (collapsed stacks, feed to flamegraph.pl or speedscope) plus PREFIX.json, a summary
+of the counters, timers and the top functions.
+"""
+import argparse
+import cProfile
+import functools
+import json
+import os
+import pstats
+import runpy
+import sys
+import threading
+import time
+from collections import Counter
+
+enabled = False
+counters = {}  # name -> total
+timers = {}  # name -> [calls, total seconds, longest]
+lock = threading.Lock()  # the barber threads count at the same time, += on a dict isn't atomic
+
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+
+def reset():
+    with lock:
+        counters.clear()
+        timers.clear()
+
+
+def count(name, amount=1):
+    if enabled:
+        with lock:
+            counters[name] = counters.get(name, 0) + amount
+
+
+def record(name, seconds):
+    with lock:
+        entry = timers.get(name)
+        if entry is None:
+            timers[name] = [1, seconds, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+
+class timer:
+    # with timer("name"): ... or @timer("name") on a function, both only measure when profiling is enabled
+    def __init__(self, name):
+        self.name = name
+        self.started = []  # a stack so the same timer can be nested or reused
+
+    def __enter__(self):
+        if enabled:
+            self.started.append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.started:
+            record(self.name, time.perf_counter() - self.started.pop())
+
+    def __call__(self, function):
+        name = self.name
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - started)
+        return timed
+
+
+def summary():
+    with lock:
+        return {
+            "counters": dict(sorted(counters.items())),
+            "timers": {name: {"calls": calls, "total": total, "mean": total / calls, "max": longest}
+                       for name, (calls, total, longest) in sorted(timers.items())},
+        }
+
+
+def write(path, **extra):  # the summary as json, with anything else worth keeping next to it
+    report = summary()
+    report.update(extra)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+class Sampler(threading.Thread):
+    # statistical profiler: every interval look at what every other thread is running and count the stacks,
+    # cheap enough to leave on for long runs and unlike cProfile it sees worker threads too
+    def __init__(self, interval=0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self.done = threading.Event()
+
+    def run(self):
+        own = threading.get_ident()
+        while not self.done.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append("{}:{}".format(os.path.basename(code.co_filename), code.co_name))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self.done.set()
+        self.join()
+
+    def top(self, limit):  # functions that were on top of the stack most often
+        own = Counter()
+        for stack, hits in self.stacks.items():
+            own[stack.rsplit(";", 1)[-1]] += hits
+        total = sum(own.values()) or 1
+        return [{"function": function, "samples": hits, "fraction": hits / total} for function, hits in own.most_common(limit)]
+
+
+def top_functions(profiler, limit):  # cProfile's heaviest functions by time spent inside them
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+    return [{"function": "{}:{}({})".format(os.path.basename(filename), line, name), "calls": calls,
+             "own_seconds": own, "cumulative_seconds": cumulative}
+            for (filename, line, name), (_, calls, own, cumulative, _) in rows]
+
+
+def run_script(script, args):  # run script as if it was started from the command line, returns its exit code
+    sys.argv = [script] + args
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))  # so it finds its neighbouring modules like it would normally
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as exit:
+        return exit.code if isinstance(exit.code, int) else (0 if exit.code is None else 1)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one of the repo's scripts with profiling and the hot loop counters turned on")
+    parser.add_argument("--profile", choices=["cprofile", "sample"], default="cprofile",
+                        help="cprofile traces every call in the main thread, sample takes stack samples from every thread")
+    parser.add_argument("-o", "--output", default="profile", help="prefix for the .prof/.samples and .json files")
+    parser.add_argument("--interval", type=float, default=5, help="milliseconds between samples")
+    parser.add_argument("--top", type=int, default=25, help="functions to list in the json summary")
+    parser.add_argument("script")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="passed on to the script")
+    args = parser.parse_args()
+
+    enable()
+    begin = time.perf_counter()
+    if args.profile == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            code = run_script(args.script, args.args)
+        finally:
+            profiler.disable()
+        profile_file = args.output + ".prof"
+        profiler.dump_stats(profile_file)
+        top = top_functions(profiler, args.top)
+    else:
+        sampler = Sampler(args.interval / 1000)
+        sampler.start()
+        try:
+            code = run_script(args.script, args.args)
+        finally:
+            sampler.stop()
+        profile_file = args.output + ".samples"
+        with open(profile_file, "w") as f:
+            for stack, hits in sampler.stacks.most_common():
+                f.write("{} {}\n".format(stack, hits))
+        top = sampler.top(args.top)
+    elapsed = time.perf_counter() - begin
+
+    write(args.output + ".json", script=args.script, args=args.args, profiler=args.profile, exit_code=code,
+          wall_seconds=elapsed, profile_file=profile_file, top=top)
+    print("\nprofiled {} in {:.3f}s, wrote {} and {}".format(args.script, elapsed, profile_file, args.output + ".json"), file=sys.stderr)
+    return code
+
+
+if __name__ == "__main__":
+    sys.modules["profiling"] = sys.modules[__name__]  # so the scripts' "import profiling" gets these counters, not a second copy
+    sys.exit(main())